@@ -0,0 +1,92 @@
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def generation_key(*scope):
+    return 'generation:' + ':'.join(str(part) for part in scope)
+
+
+def changed_key(*scope):
+    return 'changed:' + ':'.join(str(part) for part in scope)
+
+
+def _initial():
+    return int(time.time() * 1000)
+
+
+def get_generation(*scope):
+    """Возвращает текущее поколение содержимого области.
+
+    Поколение входит в ключи кеша, поэтому смена поколения делает
+    недоступными все закешированные для области фрагменты. Начальное
+    значение берётся из часов, чтобы после вытеснения ключа не
+    повторить одно из прежних поколений.
+    """
+    key = generation_key(*scope)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, _initial(), None)
+        generation = cache.get(key, _initial())
+    return generation
+
+
+def get_generations(*scopes):
+    """Поколения нескольких областей одним чтением из кеша."""
+    keys = [generation_key(*scope) for scope in scopes]
+    found = cache.get_many(keys)
+    return [
+        found[key] if key in found else get_generation(*scope)
+        for key, scope in zip(keys, scopes)
+    ]
+
+
+def changed_at(*scope):
+    """Время последней смены поколения области.
+
+    Если отметка вытеснена из кеша, временем смены считается текущий
+    момент: лишний полный ответ безопаснее устаревшего 304.
+    """
+    key = changed_key(*scope)
+    changed = cache.get(key)
+    if changed is None:
+        cache.add(key, time.time(), None)
+        changed = cache.get(key, time.time())
+    return datetime.fromtimestamp(changed, timezone.utc)
+
+
+def bump_generation(*scopes):
+    """Переводит области на новое поколение. Принимает кортежи областей."""
+    for scope in scopes:
+        key = generation_key(*scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial(), None)
+    now = time.time()
+    cache.set_many(
+        {changed_key(*scope): now for scope in scopes}, None
+    )
+
+
+def fragment_context(*scope):
+    """Контекст для тега {% cache %} с версией по поколению области."""
+    return {
+        'fragment_timeout': settings.FRAGMENT_CACHE_TIMEOUT,
+        'fragment_version': get_generation(*scope),
+    }
+
+
+def page_scopes(scopes):
+    """Указывает функцию областей страницы представления.
+
+    Функция получает аргументы представления и возвращает список
+    областей, по поколениям которых строятся ключ кеша страниц и
+    валидаторы, или None, если показанного объекта нет.
+    """
+    def decorator(view):
+        view.page_scopes = scopes
+        return view
+    return decorator
@@ -0,0 +1,99 @@
+import os
+import statistics
+import tempfile
+import time
+from multiprocessing import get_context
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from core.cache_backends import SQLiteCache
+
+PAYLOAD = {'html': 'x' * 2048, 'count': 10}
+
+
+def backends(directory):
+    params = {'OPTIONS': {'MAX_ENTRIES': 100000}}
+    return {
+        'LocMemCache': lambda: LocMemCache('bench', params),
+        'FileBasedCache': lambda: FileBasedCache(
+            os.path.join(directory, 'files'), params
+        ),
+        'SQLiteCache': lambda: SQLiteCache(
+            os.path.join(directory, 'cache.sqlite3'), params
+        ),
+    }
+
+
+def _increment(factory, count):
+    cache = factory()
+    for _ in range(count):
+        cache.incr('counter')
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает LocMemCache, FileBasedCache и SQLiteCache: задержку '
+        'get/set/incr и общий счётчик при записи из нескольких процессов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--operations', type=int, default=2000)
+        parser.add_argument('--processes', type=int, default=4)
+
+    def handle(self, *args, **options):
+        count = options['operations']
+        with tempfile.TemporaryDirectory() as directory:
+            for name, factory in backends(directory).items():
+                cache = factory()
+                cache.clear()
+                timings = {
+                    'set': self.measure(
+                        lambda n: cache.set(f'key:{n}', PAYLOAD), count
+                    ),
+                    'get': self.measure(
+                        lambda n: cache.get(f'key:{n}'), count
+                    ),
+                }
+                cache.set('counter', 0)
+                timings['incr'] = self.measure(
+                    lambda n: cache.incr('counter'), count
+                )
+                shared = self.shared_counter(
+                    factory, options['processes'], count // 10
+                )
+                self.stdout.write(
+                    f'{name:>15}: '
+                    + '  '.join(
+                        f'{op} {value * 1e6:7.1f} us'
+                        for op, value in timings.items()
+                    )
+                    + f'  shared incr {shared}/'
+                    f'{options["processes"] * (count // 10)}'
+                )
+
+    @staticmethod
+    def measure(operation, count):
+        timings = []
+        for number in range(count):
+            started = time.perf_counter()
+            operation(number)
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings)
+
+    @staticmethod
+    def shared_counter(factory, processes, count):
+        """Сколько инкрементов из дочерних процессов видит родитель."""
+        cache = factory()
+        cache.set('counter', 0)
+        context = get_context('fork')
+        workers = [
+            context.Process(target=_increment, args=(factory, count))
+            for _ in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return cache.get('counter')
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.middleware import page_cache_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает попадания и промахи кеша страниц всех процессов. '
+        'Итоги приблизительные: воркеры сбрасывают счётчики раз в '
+        'PAGE_CACHE_STATS_FLUSH секунд.'
+    )
+
+    def handle(self, *args, **options):
+        stats = page_cache_stats()
+        total = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / total * 100 if total else 0
+        self.stdout.write(
+            f'Попаданий: {stats["hits"]}, промахов: {stats["misses"]}, '
+            f'доля попаданий: {ratio:.1f}%'
+        )
+        self.stdout.write(
+            'Счётчики воркеров отстают не более чем на '
+            f'{settings.PAGE_CACHE_STATS_FLUSH} с.'
+        )
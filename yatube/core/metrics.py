@@ -0,0 +1,239 @@
+import functools
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.db import connections
+from django.template.base import Node, Template, TokenType
+
+_local = threading.local()
+_missing = object()
+
+
+class TemplateProfile:
+    """Число вызовов, полное и собственное время шаблонов и тегов.
+
+    Собственное время не включает вложенные шаблоны и теги, поэтому
+    по нему видно, какой фрагмент страницы дороже всего.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self._children = []
+
+    def measure(self, name, render, *args):
+        self._children.append(0.0)
+        started = time.perf_counter()
+        try:
+            return render(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            children = self._children.pop()
+            if self._children:
+                self._children[-1] += elapsed
+            entry = self.entries.setdefault(name, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] += elapsed - children
+
+    def report(self, limit=None):
+        """Записи по убыванию собственного времени."""
+        rows = sorted(
+            self.entries.items(), key=lambda item: item[1][2], reverse=True
+        )
+        return [
+            {
+                'name': name,
+                'calls': calls,
+                'total_ms': round(total * 1000, 3),
+                'self_ms': round(own * 1000, 3),
+            }
+            for name, (calls, total, own) in rows[:limit]
+        ]
+
+
+class RequestMetrics:
+    """Счётчики одного запроса: SQL, шаблоны и кеш."""
+    __slots__ = (
+        'queries', 'sql_time', 'template_time',
+        'cache_hits', 'cache_misses', 'cache_time', 'profile',
+    )
+
+    def __init__(self, profile=None):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_time = 0.0
+        self.profile = profile
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_time += time.perf_counter() - started
+
+    def as_dict(self):
+        return {
+            'queries': self.queries,
+            'sql_ms': round(self.sql_time * 1000, 2),
+            'template_ms': round(self.template_time * 1000, 2),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'cache_ms': round(self.cache_time * 1000, 2),
+        }
+
+    def server_timing(self, total):
+        return ', '.join((
+            f'sql;dur={self.sql_time * 1000:.2f};'
+            f'desc="{self.queries} queries"',
+            f'tpl;dur={self.template_time * 1000:.2f}',
+            f'cache;dur={self.cache_time * 1000:.2f};'
+            f'desc="hits={self.cache_hits} misses={self.cache_misses}"',
+            f'total;dur={total * 1000:.2f}',
+        ))
+
+
+def current():
+    """Счётчики текущего запроса или None вне collect()."""
+    return getattr(_local, 'metrics', None)
+
+
+@contextmanager
+def collect(profile_templates=False):
+    """Собирает счётчики кода внутри блока.
+
+    С profile_templates=True дополнительно строит TemplateProfile.
+    """
+    profile = None
+    if profile_templates:
+        _instrument_profiling()
+        profile = TemplateProfile()
+    metrics = RequestMetrics(profile)
+    previous, _local.metrics = current(), metrics
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+            yield metrics
+    finally:
+        _local.metrics = previous
+
+
+def _timed_render(render):
+    @functools.wraps(render)
+    def wrapper(self, context):
+        metrics = current()
+        if metrics is None:
+            return render(self, context)
+        top_level = context.template is None
+        started = time.perf_counter()
+        try:
+            if metrics.profile is None:
+                return render(self, context)
+            return metrics.profile.measure(
+                self.name or '<string>', render, self, context
+            )
+        finally:
+            if top_level:
+                metrics.template_time += time.perf_counter() - started
+    wrapper.instrumented = True
+    return wrapper
+
+
+def _tag_name(node):
+    name = getattr(node, '_profile_name', None)
+    if name is None:
+        origin = getattr(node, 'origin', None)
+        name = node._profile_name = '{}:{} {{% {} %}}'.format(
+            getattr(origin, 'template_name', None) or '<string>',
+            node.token.lineno,
+            node.token.contents,
+        )
+    return name
+
+
+def _profiled_tag(render_annotated):
+    @functools.wraps(render_annotated)
+    def wrapper(self, context):
+        metrics = current()
+        token = getattr(self, 'token', None)
+        if (
+            metrics is None or metrics.profile is None
+            or token is None or token.token_type != TokenType.BLOCK
+        ):
+            return render_annotated(self, context)
+        return metrics.profile.measure(
+            _tag_name(self), render_annotated, self, context
+        )
+    wrapper.instrumented = True
+    return wrapper
+
+
+def _counted_get(get):
+    @functools.wraps(get)
+    def wrapper(self, key, default=None, version=None):
+        metrics = current()
+        if metrics is None:
+            return get(self, key, default, version)
+        started = time.perf_counter()
+        value = get(self, key, _missing, version)
+        metrics.cache_time += time.perf_counter() - started
+        if value is _missing:
+            metrics.cache_misses += 1
+            return default
+        metrics.cache_hits += 1
+        return value
+    wrapper.instrumented = True
+    return wrapper
+
+
+def _counted_get_many(get_many):
+    @functools.wraps(get_many)
+    def wrapper(self, keys, version=None):
+        metrics = current()
+        if metrics is None:
+            return get_many(self, keys, version)
+        keys = list(keys)
+        started = time.perf_counter()
+        found = get_many(self, keys, version)
+        metrics.cache_time += time.perf_counter() - started
+        metrics.cache_hits += len(found)
+        metrics.cache_misses += len(keys) - len(found)
+        return found
+    wrapper.instrumented = True
+    return wrapper
+
+
+def _patch(cls, name, decorator):
+    owner = next(klass for klass in cls.__mro__ if name in klass.__dict__)
+    method = owner.__dict__[name]
+    if not getattr(method, 'instrumented', False):
+        setattr(owner, name, decorator(method))
+
+
+def _instrument_profiling():
+    """Обёртка тегов ставится только при первом включении профиля:
+    render_annotated вызывается для каждого узла шаблона.
+    """
+    _patch(Node, 'render_annotated', _profiled_tag)
+
+
+def instrument():
+    """Подключает замеры к шаблонам и классам настроенных кешей.
+
+    Обёртки ничего не считают вне collect(). get_many оборачивается
+    только у бэкендов со своей реализацией: базовая вызывает get.
+    """
+    _patch(Template, 'render', _timed_render)
+    for alias in settings.CACHES:
+        cls = type(caches[alias])
+        _patch(cls, 'get', _counted_get)
+        if cls.get_many is not BaseCache.get_many:
+            _patch(cls, 'get_many', _counted_get_many)
@@ -0,0 +1,191 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from . import metrics
+from .cache import get_generations
+
+logger = logging.getLogger(__name__)
+
+HITS_KEY = 'page_cache:hits'
+MISSES_KEY = 'page_cache:misses'
+
+
+_stats_lock = threading.Lock()
+_pending = dict.fromkeys((HITS_KEY, MISSES_KEY), 0)
+_flushed_at = time.monotonic()
+
+
+def _take_pending():
+    global _flushed_at
+    pending = dict(_pending)
+    for key in _pending:
+        _pending[key] = 0
+    _flushed_at = time.monotonic()
+    return pending
+
+
+def _flush(pending):
+    for key, count in pending.items():
+        if count and not cache.add(key, count, None):
+            try:
+                cache.incr(key, count)
+            except ValueError:
+                pass
+
+
+def _count(key):
+    """Считает попадание или промах в памяти процесса.
+
+    В общий кеш счётчики уходят не чаще раза в PAGE_CACHE_STATS_FLUSH
+    секунд, чтобы попадание в кеш страниц не стоило записи в него.
+    """
+    with _stats_lock:
+        _pending[key] += 1
+        if time.monotonic() - _flushed_at < settings.PAGE_CACHE_STATS_FLUSH:
+            return
+        pending = _take_pending()
+    _flush(pending)
+
+
+def page_cache_stats():
+    """Возвращает число попаданий и промахов кеша страниц.
+
+    Итоги приблизительные: сбрасываются только счётчики текущего
+    процесса, а остальные воркеры отстают до PAGE_CACHE_STATS_FLUSH
+    секунд, а вытесненные из кеша счётчики начинаются заново.
+    Для консоли есть команда page_cache_stats.
+    """
+    with _stats_lock:
+        pending = _take_pending()
+    _flush(pending)
+    stats = cache.get_many([HITS_KEY, MISSES_KEY])
+    return {
+        'hits': stats.get(HITS_KEY, 0),
+        'misses': stats.get(MISSES_KEY, 0),
+    }
+
+
+class AnonymousPageCacheMiddleware:
+    """Кеширует страницы целиком для анонимных читателей.
+
+    Ключ строится из пути с параметрами (номер страницы или курсор)
+    и поколений областей, которые представление объявило через
+    page_scopes: правка в чужой группе или у другого автора не
+    вытесняет страницу. Запросы с cookie сессии или CSRF не кешируются:
+    их страницы зависят от пользователя.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        key = getattr(request, '_page_cache_key', None)
+        if key is None:
+            return response
+        if self.is_cacheable(response):
+            cache.set(key, response, settings.PAGE_CACHE_TIMEOUT)
+        response['X-Page-Cache'] = 'MISS'
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not self.is_anonymous(request):
+            return None
+        if request.resolver_match.view_name not in settings.PAGE_CACHE_VIEWS:
+            return None
+        scopes = getattr(view_func, 'page_scopes', None)
+        scopes = scopes and scopes(request, *view_args, **view_kwargs)
+        if not scopes:
+            return None
+        version = '.'.join(map(str, get_generations(*scopes)))
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        key = f'page:{version}:{request.method}:{path}'
+        response = cache.get(key)
+        if response is not None:
+            _count(HITS_KEY)
+            logger.debug('Page cache hit: %s', request.get_full_path())
+            last_modified = response.get('Last-Modified')
+            response = get_conditional_response(
+                request,
+                etag=response.get('ETag'),
+                last_modified=(
+                    last_modified and parse_http_date_safe(last_modified)
+                ),
+                response=response,
+            )
+            response['X-Page-Cache'] = 'HIT'
+            return response
+        _count(MISSES_KEY)
+        logger.debug('Page cache miss: %s', request.get_full_path())
+        request._page_cache_key = key
+        return None
+
+    @staticmethod
+    def is_anonymous(request):
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        if 'HTTP_AUTHORIZATION' in request.META:
+            return False
+        return not (
+            settings.SESSION_COOKIE_NAME in request.COOKIES
+            or settings.CSRF_COOKIE_NAME in request.COOKIES
+        )
+
+    @staticmethod
+    def is_cacheable(response):
+        if response.status_code != 200 or response.streaming:
+            return False
+        if response.cookies:
+            return False
+        cache_control = response.get('Cache-Control', '')
+        if 'private' in cache_control or 'no-store' in cache_control:
+            return False
+        return True
+
+
+class RequestMetricsMiddleware:
+    """Считает запросы к базе, время SQL, шаблонов и обращения к кешу.
+
+    Итоги уходят в заголовок Server-Timing, а запросы дольше
+    REQUEST_METRICS_SLOW_MS пишутся в лог одной строкой JSON.
+    При TEMPLATE_PROFILING в лог уходит и профиль шаблонов и тегов.
+    Стоит первым в MIDDLEWARE, чтобы учитывать и кеш страниц.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        metrics.instrument()
+
+    def __call__(self, request):
+        with metrics.collect(settings.TEMPLATE_PROFILING) as collected:
+            started = time.perf_counter()
+            response = self.get_response(request)
+            total = time.perf_counter() - started
+        if settings.REQUEST_METRICS_SERVER_TIMING:
+            response['Server-Timing'] = collected.server_timing(total)
+        if total * 1000 >= settings.REQUEST_METRICS_SLOW_MS:
+            match = request.resolver_match
+            logger.warning('Slow request: %s', json.dumps({
+                'method': request.method,
+                'path': request.get_full_path(),
+                'view': match.view_name if match else None,
+                'status': response.status_code,
+                'total_ms': round(total * 1000, 2),
+                **collected.as_dict(),
+            }, ensure_ascii=False))
+        if collected.profile is not None:
+            logger.info('Template profile: %s', json.dumps({
+                'path': request.get_full_path(),
+                'templates': collected.profile.report(
+                    settings.TEMPLATE_PROFILING_TOP
+                ),
+            }, ensure_ascii=False))
+        return response
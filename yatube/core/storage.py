@@ -0,0 +1,65 @@
+import hashlib
+import os
+import uuid
+
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+CLAIM_TIMEOUT = 60 * 10
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Файловое хранилище, называющее файлы по SHA-256 содержимого.
+
+    Файл сохраняется как <каталог>/<2 символа хеша>/<хеш><расширение>,
+    поэтому одинаковые загрузки занимают на диске одно место. Хеш
+    считается по частям, файл целиком в память не читается.
+
+    Сохранение помечает файл как занятый (claim), пока ссылку на него
+    не запишут в базу. Удаление общего файла сначала убирает его под
+    временное имя (retire) и возвращает обратно (restore), если за это
+    время файл кто-то занял.
+    """
+
+    def _save(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        directory, basename = os.path.split(name)
+        extension = os.path.splitext(basename)[1].lower()
+        hexdigest = digest.hexdigest()
+        name = os.path.join(directory, hexdigest[:2], hexdigest + extension)
+        self.claim(name)
+        if self.exists(name):
+            return name
+        return super()._save(name, content)
+
+    def _claim_key(self, name):
+        source = f'{self.location}:{name}'
+        return 'media:claim:' + hashlib.md5(source.encode()).hexdigest()
+
+    def claim(self, name):
+        cache.set(self._claim_key(name), True, CLAIM_TIMEOUT)
+
+    def settle(self, name):
+        """Снимает отметку, когда ссылка на файл уже есть в базе."""
+        cache.delete(self._claim_key(name))
+
+    def is_claimed(self, name):
+        return cache.get(self._claim_key(name)) is not None
+
+    def retire(self, name):
+        """Переименовывает файл во временный; None, если файла уже нет."""
+        path = self.path(name)
+        retired = f'{path}.{uuid.uuid4().hex}.retired'
+        try:
+            os.rename(path, retired)
+        except FileNotFoundError:
+            return None
+        return retired
+
+    def restore(self, name, retired):
+        # Новая копия с тем же именем совпадает побайтно, её можно заменить.
+        os.replace(retired, self.path(name))
@@ -1,4 +1,28 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+from multiprocessing import get_context
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from .cache_backends import SQLiteCache
+from .storage import ContentAddressedStorage
+from . import metrics
+from .middleware import HITS_KEY, MISSES_KEY, page_cache_stats
+
+User = get_user_model()
 
 
 class ViewTestClass(TestCase):
@@ -6,3 +30,242 @@ class ViewTestClass(TestCase):
         response = self.client.get('/nonexist-page/')
         self.assertEqual(response.status_code, 404)
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    @override_settings(PAGE_CACHE_STATS_FLUSH=3600)
+    def test_anonymous_page_is_served_from_cache(self):
+        """Повторный анонимный запрос отдаётся из кеша без запросов к БД."""
+        before = page_cache_stats()
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        with self.assertNumQueries(0), \
+                mock.patch.object(cache, 'incr') as incr, \
+                mock.patch.object(cache, 'set') as cache_set:
+            response = self.guest_client.get(reverse('posts:index'))
+        incr.assert_not_called()
+        cache_set.assert_not_called()
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+        self.assertContains(response, 'Тестовый пост')
+        self.assertEqual(page_cache_stats(), {
+            'hits': before['hits'] + 1, 'misses': before['misses'] + 1,
+        })
+
+    def test_stats_command(self):
+        """Команда page_cache_stats выводит сброшенные счётчики."""
+        page_cache_stats()
+        cache.set_many({HITS_KEY: 3, MISSES_KEY: 1}, None)
+        out = StringIO()
+        call_command('page_cache_stats', stdout=out)
+        self.assertIn(
+            'Попаданий: 3, промахов: 1, доля попаданий: 75.0%',
+            out.getvalue(),
+        )
+
+    def test_pages_are_cached_separately(self):
+        """Разные страницы и курсоры кешируются под разными ключами."""
+        self.guest_client.get(reverse('posts:index'))
+        response = self.guest_client.get(reverse('posts:index') + '?page=2')
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+
+    def test_content_change_invalidates_cache(self):
+        """Новый пост сразу виден анонимному читателю."""
+        self.guest_client.get(reverse('posts:index'))
+        Post.objects.create(author=self.user, text='Свежий пост')
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        self.assertContains(response, 'Свежий пост')
+
+    def test_requests_with_cookies_are_not_cached(self):
+        """Запросы с cookie сессии или CSRF не используют кеш."""
+        for cookie in ('sessionid', 'csrftoken'):
+            with self.subTest(cookie=cookie):
+                client = Client()
+                client.cookies[cookie] = 'value'
+                client.get(reverse('posts:index'))
+                response = client.get(reverse('posts:index'))
+                self.assertFalse(response.has_header('X-Page-Cache'))
+
+    def test_authorized_user_is_not_served_cached_page(self):
+        """Авторизованный пользователь не получает анонимную копию."""
+        self.guest_client.get(reverse('posts:index'))
+        authorized_client = Client()
+        authorized_client.force_login(self.user)
+        response = authorized_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Пользователь: auth')
+
+
+class RequestMetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def timings(self, response):
+        return dict(
+            entry.split(';', 1)
+            for entry in response['Server-Timing'].split(', ')
+        )
+
+    @override_settings(REQUEST_METRICS_SERVER_TIMING=True)
+    def test_server_timing_header(self):
+        """Server-Timing содержит SQL, шаблоны, кеш и общее время."""
+        response = self.guest_client.get(reverse('posts:index'))
+        timings = self.timings(response)
+        self.assertEqual(set(timings), {'sql', 'tpl', 'cache', 'total'})
+        self.assertRegex(
+            timings['sql'], r'^dur=[\d.]+;desc="[1-9]\d* queries"$'
+        )
+        self.assertIn('misses', timings['cache'])
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertIn('desc="0 queries"', self.timings(response)['sql'])
+
+    @override_settings(REQUEST_METRICS_SERVER_TIMING=False)
+    def test_server_timing_can_be_disabled(self):
+        """Без REQUEST_METRICS_SERVER_TIMING заголовок не отдаётся."""
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_collect_counts_queries_templates_and_cache(self):
+        """collect() считает запросы, рендер шаблонов и попадания в кеш."""
+        cache.set('present', 1)
+        with metrics.collect() as collected:
+            User.objects.count()
+            cache.get('present')
+            cache.get_many(['present', 'absent'])
+            Template('{{ text }}').render(Context({'text': 'Текст'}))
+        self.assertGreaterEqual(collected.queries, 1)
+        self.assertGreater(collected.template_time, 0)
+        self.assertEqual(collected.cache_hits, 2)
+        self.assertEqual(collected.cache_misses, 1)
+        self.assertIsNone(metrics.current())
+
+    @override_settings(REQUEST_METRICS_SLOW_MS=0)
+    def test_slow_request_is_logged(self):
+        """Запрос дольше порога пишется в лог с метриками."""
+        with self.assertLogs('core.middleware', 'WARNING') as logs:
+            self.guest_client.get(reverse('posts:index'))
+        self.assertIn('"view": "posts:index"', logs.output[0])
+        self.assertIn('"queries": ', logs.output[0])
+
+    @override_settings(TEMPLATE_PROFILING=True, TEMPLATE_PROFILING_TOP=None)
+    def test_template_profile_is_logged(self):
+        """Профиль шаблонов считает вызовы шаблонов и тегов include."""
+        with self.assertLogs('core.middleware', 'INFO') as logs:
+            self.guest_client.get(reverse('posts:index'))
+        output = next(line for line in logs.output if 'profile' in line)
+        profile = json.loads(output.split('Template profile: ', 1)[1])
+        entries = {entry['name']: entry for entry in profile['templates']}
+        self.assertEqual(entries['posts/includes/post_info.html']['calls'], 1)
+        include = next(
+            entry for name, entry in entries.items()
+            if name.startswith('posts/index.html:')
+            and "include 'posts/includes/post_info.html'" in name
+        )
+        self.assertGreaterEqual(include['total_ms'], include['self_ms'])
+        page = entries['posts/index.html']
+        self.assertLess(page['self_ms'], page['total_ms'])
+
+
+def increment_shared_counter(location, count):
+    cache = SQLiteCache(location, {})
+    for _ in range(count):
+        cache.incr('counter')
+
+
+class SQLiteCacheTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.location = os.path.join(self.directory, 'cache.sqlite3')
+        self.cache = SQLiteCache(self.location, {})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_basic_operations(self):
+        """Кеш хранит, отдаёт и удаляет значения."""
+        self.assertTrue(self.cache.add('key', {'value': 1}))
+        self.assertFalse(self.cache.add('key', 'other'))
+        self.assertEqual(self.cache.get('key'), {'value': 1})
+        self.cache.set_many({'first': 1, 'second': 2})
+        self.assertEqual(
+            self.cache.get_many(['first', 'second', 'missing']),
+            {'first': 1, 'second': 2},
+        )
+        self.cache.delete_many(['first', 'key'])
+        self.assertIsNone(self.cache.get('key'))
+        self.assertEqual(self.cache.incr('second', 5), 7)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_values_expire(self):
+        """Записи с истёкшим сроком не отдаются."""
+        self.cache.set('key', 'value', 10)
+        expired = time.time() + 11
+        with mock.patch('core.cache_backends.time.time',
+                        return_value=expired):
+            self.assertIsNone(self.cache.get('key'))
+            self.assertFalse(self.cache.has_key('key'))
+            self.assertTrue(self.cache.add('key', 'new value'))
+
+    def test_size_is_capped(self):
+        """Число записей не превышает MAX_ENTRIES после чистки."""
+        cache = SQLiteCache(self.location, {'OPTIONS': {
+            'MAX_ENTRIES': 10, 'CULL_FREQUENCY': 2, 'CULL_EVERY': 5,
+        }})
+        for number in range(50):
+            cache.set(f'key:{number}', number)
+        stored = sum(
+            cache.has_key(f'key:{number}') for number in range(50)
+        )
+        self.assertLessEqual(stored, 10)
+
+    def test_incr_is_atomic_across_processes(self):
+        """Инкременты из разных процессов не теряются."""
+        self.cache.set('counter', 0)
+        context = get_context('fork')
+        workers = [
+            context.Process(
+                target=increment_shared_counter, args=(self.location, 50)
+            )
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(self.cache.get('counter'), 200)
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.storage = ContentAddressedStorage(location=self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_identical_content_stored_once(self):
+        """Одинаковое содержимое сохраняется в один файл по хешу."""
+        first = self.storage.save('posts/a.JPG', ContentFile(b'picture'))
+        second = self.storage.save('posts/b.jpg', ContentFile(b'picture'))
+        other = self.storage.save('posts/c.jpg', ContentFile(b'another'))
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertRegex(first, r'^posts/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$')
+        self.assertEqual(len(os.listdir(self.directory + '/posts')), 2)
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Post, Group, Comment, Follow
+from .models import Post, Group, Comment, Follow, UserStats
+from .search import fts_query, matching
 
 EMPTY_VALUE = '-пусто-'
 
@@ -13,6 +14,15 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = EMPTY_VALUE
 
+    def get_search_results(self, request, queryset, search_term):
+        """Ищет по полнотекстовому индексу вместо LIKE по text."""
+        if not search_term.strip():
+            return queryset, False
+        query = fts_query(search_term)
+        if not query:
+            return queryset.none(), False
+        return matching(queryset, query), False
+
 
 @admin.register(Group)
 class GroupAdmin(admin.ModelAdmin):
@@ -34,3 +44,14 @@ class FollowAdmin(admin.ModelAdmin):
     list_display = ('pk', 'user', 'author')
     search_fields = ('author',)
     list_filter = ('author',)
+
+
+@admin.register(UserStats)
+class UserStatsAdmin(admin.ModelAdmin):
+    list_display = (
+        'user', 'posts_count', 'followers_count', 'following_count'
+    )
+    search_fields = ('user__username',)
+    readonly_fields = (
+        'user', 'posts_count', 'followers_count', 'following_count'
+    )
@@ -0,0 +1,33 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Comment, Post
+
+
+def refresh(posts=None):
+    """Пересчитывает число комментариев и последний комментарий постов."""
+    if posts is None:
+        posts = Post.objects.all()
+    comments = Comment.objects.filter(post=OuterRef('pk')).order_by()
+    totals = comments.values('post').annotate(
+        total=Count('pk')
+    ).values('total')
+    latest = comments.order_by('-created', '-pk').values('pk')[:1]
+    return posts.update(
+        comment_count=Coalesce(Subquery(totals), 0),
+        last_comment=Subquery(latest),
+        updated=timezone.now(),
+    )
+
+
+def comment_added(comment):
+    Post.objects.filter(pk=comment.post_id).update(
+        comment_count=F('comment_count') + 1,
+        last_comment=comment.pk,
+        updated=timezone.now(),
+    )
+
+
+def comment_removed(comment):
+    refresh(Post.objects.filter(pk=comment.post_id))
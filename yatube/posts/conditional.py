@@ -0,0 +1,173 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+
+from core.cache import changed_at, get_generations
+
+from .models import Group, Post, User
+
+
+def lookup_key(kind, value):
+    value = hashlib.md5(str(value).encode()).hexdigest()
+    return f'scope-lookup:{kind}:{value}'
+
+
+def forget(kind, *values):
+    """Сбрасывает запомненные id областей после правки объекта."""
+    cache.delete_many([lookup_key(kind, value) for value in values])
+
+
+def _remembered(kind, value, lookup):
+    """Id для области страницы без запроса к БД на попадании в кеш."""
+    key = lookup_key(kind, value)
+    found = cache.get(key)
+    if found is None:
+        found = lookup()
+        if found is not None:
+            cache.set(key, found, None)
+    return found
+
+
+def _scopes(request, compute):
+    if not hasattr(request, '_page_scopes'):
+        request._page_scopes = compute()
+    return request._page_scopes
+
+
+def index_scopes(request):
+    return [('posts',)]
+
+
+def group_scopes(request, slug):
+    def compute():
+        group_id = _remembered('group', slug, lambda: Group.objects.filter(
+            slug=slug
+        ).values_list('pk', flat=True).first())
+        return group_id and [('group', group_id)]
+    return _scopes(request, compute)
+
+
+def profile_scopes(request, username):
+    def compute():
+        author_id = _remembered(
+            'author', username, lambda: User.objects.filter(
+                username=username
+            ).values_list('pk', flat=True).first()
+        )
+        return author_id and [('author', author_id)]
+    return _scopes(request, compute)
+
+
+def post_detail_scopes(request, post_id):
+    """Пост, а также сведения об авторе и группе из боковой колонки."""
+    def compute():
+        found = _remembered('post', post_id, lambda: Post.objects.filter(
+            pk=post_id
+        ).values_list('author_id', 'group_id').first())
+        if found is None:
+            return None
+        author_id, group_id = found
+        scopes = [('post', post_id), ('author', author_id, 'info')]
+        if group_id is not None:
+            scopes.append(('group', group_id, 'info'))
+        return scopes
+    return _scopes(request, compute)
+
+
+def _latest(request, scopes, compute):
+    """Считает дату последнего изменения один раз на запрос.
+
+    Правки видны по полю updated, а удаления и переносы между группами
+    не оставляют следа в выборке, поэтому к дате добавляется время
+    последней смены поколения областей страницы.
+    """
+    if not hasattr(request, '_latest_change'):
+        latest = compute()
+        request._latest_change = latest and max(
+            latest, *(changed_at(*scope) for scope in scopes)
+        )
+    return request._latest_change
+
+
+def _etag(request, scopes, latest, *parts):
+    if latest is None:
+        return None
+    user = request.user
+    source = ':'.join(str(part) for part in (
+        *parts,
+        latest.isoformat(),
+        *get_generations(*scopes),
+        request.get_full_path(),
+        user.pk if user.is_authenticated else '',
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+    ))
+    return '"%s"' % hashlib.md5(source.encode()).hexdigest()
+
+
+def _newest_post(**filters):
+    return Post.objects.filter(**filters).aggregate(
+        latest=Max('updated')
+    )['latest']
+
+
+def index_last_modified(request):
+    scopes = index_scopes(request)
+    return _latest(request, scopes, _newest_post)
+
+
+def index_etag(request):
+    return _etag(
+        request, index_scopes(request), index_last_modified(request), 'index'
+    )
+
+
+def group_last_modified(request, slug):
+    scopes = group_scopes(request, slug)
+    return _latest(
+        request, scopes,
+        lambda: scopes and _newest_post(group_id=scopes[0][1]),
+    )
+
+
+def group_etag(request, slug):
+    return _etag(
+        request, group_scopes(request, slug),
+        group_last_modified(request, slug), 'group', slug,
+    )
+
+
+def profile_last_modified(request, username):
+    scopes = profile_scopes(request, username)
+    return _latest(
+        request, scopes,
+        lambda: scopes and _newest_post(author_id=scopes[0][1]),
+    )
+
+
+def profile_etag(request, username):
+    return _etag(
+        request, profile_scopes(request, username),
+        profile_last_modified(request, username), 'profile', username,
+    )
+
+
+def _post_changed(post_id):
+    return Post.objects.filter(pk=post_id).values_list(
+        'updated', flat=True
+    ).first()
+
+
+def post_last_modified(request, post_id):
+    return _latest(
+        request, post_detail_scopes(request, post_id),
+        lambda: _post_changed(post_id),
+    )
+
+
+def post_etag(request, post_id):
+    return _etag(
+        request, post_detail_scopes(request, post_id),
+        post_last_modified(request, post_id), 'post', post_id,
+    )
@@ -0,0 +1,103 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Count
+from django.utils.functional import cached_property
+
+from .models import Group, Post, TimelineEntry, User
+
+GLOBAL = 'all'
+GROUP = 'group'
+AUTHOR = 'author'
+FOLLOWER = 'follower'
+
+
+def count_key(scope, pk=None):
+    if pk is None:
+        return f'posts:count:{scope}'
+    return f'posts:count:{scope}:{pk}'
+
+
+def get_count(queryset, scope, pk=None):
+    """Возвращает число постов в области из кеша или считает его."""
+    key = count_key(scope, pk)
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, settings.POST_COUNT_TIMEOUT)
+    return count
+
+
+def _adjust(keys, delta):
+    for key in keys:
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            pass
+
+
+def post_keys(post, group_id=None):
+    if group_id is None:
+        group_id = post.group_id
+    keys = [count_key(GLOBAL), count_key(AUTHOR, post.author_id)]
+    if group_id is not None:
+        keys.append(count_key(GROUP, group_id))
+    return keys
+
+
+def post_added(post):
+    _adjust(post_keys(post), 1)
+
+
+def post_removed(post):
+    _adjust(post_keys(post), -1)
+
+
+def post_regrouped(post, old_group_id):
+    if old_group_id is not None:
+        _adjust([count_key(GROUP, old_group_id)], -1)
+    if post.group_id is not None:
+        _adjust([count_key(GROUP, post.group_id)], 1)
+
+
+def timelines_changed(user_ids):
+    """Сбрасывает счётчики лент подписок: их размер ограничен обрезкой."""
+    cache.delete_many([count_key(FOLLOWER, user_id) for user_id in user_ids])
+
+
+def reconcile():
+    """Пересчитывает все счётчики и перезаписывает их в кеше.
+
+    Запускается периодически командой reconcile_post_counts,
+    чтобы исправить расхождения после гонок и вытеснений из кеша.
+    """
+    counts = {count_key(GLOBAL): Post.objects.count()}
+    groups = Group.objects.annotate(total=Count('posts'))
+    counts.update(
+        (count_key(GROUP, group.pk), group.total) for group in groups
+    )
+    authors = User.objects.annotate(total=Count('posts'))
+    counts.update(
+        (count_key(AUTHOR, author.pk), author.total) for author in authors
+    )
+    timelines = TimelineEntry.objects.order_by().values('user').annotate(
+        total=Count('pk')
+    ).values_list('user', 'total')
+    counts.update(
+        (count_key(FOLLOWER, user_id), total) for user_id, total in timelines
+    )
+    cache.set_many(counts, settings.POST_COUNT_TIMEOUT)
+    return counts
+
+
+class CachedCountPaginator(Paginator):
+    """Паджинатор, который берёт общее число постов из кеша."""
+
+    def __init__(self, object_list, per_page, scope, pk=None):
+        super().__init__(object_list, per_page)
+        self.scope = scope
+        self.pk = pk
+
+    @cached_property
+    def count(self):
+        return get_count(self.object_list, self.scope, self.pk)
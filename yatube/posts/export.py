@@ -0,0 +1,128 @@
+import io
+import json
+import logging
+import zipfile
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.db.models import Q
+
+from .models import Comment, Post
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 2000
+FLUSH_SIZE = 64 * 1024
+CONTENT_NAME = 'content.jsonl'
+MEDIA_DIR = 'media/'
+
+
+def author_content(author):
+    """Посты автора, все его комментарии и посты, к которым они написаны.
+
+    Чужие посты попадают в выгрузку, чтобы import_posts мог привязать
+    к ним комментарии автора.
+    """
+    comments = Comment.objects.filter(author=author)
+    return (
+        Post.objects.filter(
+            Q(author=author) | Q(pk__in=comments.values('post'))
+        ),
+        comments,
+    )
+
+
+def group_content(group):
+    """Посты группы и комментарии к ним."""
+    return (
+        Post.objects.filter(group=group),
+        Comment.objects.filter(post__group=group),
+    )
+
+
+def rows(posts, comments):
+    """Строки выгрузки в формате import_posts, без списка в памяти."""
+    posts = posts.select_related('author', 'group').only(
+        'text', 'pub_date', 'image', 'author__username', 'group__slug'
+    ).order_by('pk')
+    for post in posts.iterator(chunk_size=CHUNK_SIZE):
+        yield {
+            'type': 'post',
+            'id': post.pk,
+            'author': post.author.username,
+            'group': post.group.slug if post.group else None,
+            'text': post.text,
+            'pub_date': post.pub_date.isoformat(),
+            'image': post.image.name,
+        }
+    comments = comments.select_related('author').only(
+        'post', 'text', 'created', 'author__username'
+    ).order_by('pk')
+    for comment in comments.iterator(chunk_size=CHUNK_SIZE):
+        yield {
+            'type': 'comment',
+            'id': comment.pk,
+            'post': comment.post_id,
+            'author': comment.author.username,
+            'text': comment.text,
+            'created': comment.created.isoformat(),
+        }
+
+
+def jsonl(rows):
+    for row in rows:
+        yield (json.dumps(row, ensure_ascii=False) + '\n').encode()
+
+
+class _Sink(io.RawIOBase):
+    """Поток только на запись: zipfile пишет сюда, генератор забирает."""
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        self.size = 0
+        return data
+
+
+def zip_stream(posts, comments):
+    """Zip с content.jsonl и файлами картинок, отдаваемый кусками.
+
+    Архив пишется в поток без перемотки, поэтому в памяти держится
+    только последний кусок. Картинки уже сжаты и кладутся без сжатия;
+    отсутствующие в хранилище файлы пропускаются с записью в лог.
+    """
+    sink = _Sink()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as archive:
+        with archive.open(CONTENT_NAME, 'w', force_zip64=True) as entry:
+            for line in jsonl(rows(posts, comments)):
+                entry.write(line)
+                if sink.size >= FLUSH_SIZE:
+                    yield sink.take()
+        images = posts.exclude(image='').order_by('image').values_list(
+            'image', flat=True
+        ).distinct()
+        storage = Post._meta.get_field('image').storage
+        for name in images.iterator(chunk_size=CHUNK_SIZE):
+            try:
+                source = storage.open(name)
+            except (OSError, SuspiciousFileOperation):
+                logger.warning('Картинка %s не выгружена', name)
+                continue
+            info = zipfile.ZipInfo(MEDIA_DIR + name)
+            with source, archive.open(info, 'w', force_zip64=True) as entry:
+                for chunk in source.chunks():
+                    entry.write(chunk)
+                    if sink.size >= FLUSH_SIZE:
+                        yield sink.take()
+    yield sink.take()
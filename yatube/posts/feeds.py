@@ -0,0 +1,167 @@
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
+from django.views.decorators.http import condition
+
+from core.cache import page_scopes
+
+from . import conditional
+from .models import Group, Post, User
+
+
+def _author_name(author):
+    return author.get_full_name() or author.username
+
+
+class LatestPostsFeed(Feed):
+    """RSS последних записей сайта."""
+
+    def __call__(self, request, *args, **kwargs):
+        # Last-Modified ставит condition() той же функцией, по которой
+        # сверяет If-Modified-Since, а не Feed по датам показанных постов.
+        response = super().__call__(request, *args, **kwargs)
+        del response['Last-Modified']
+        return response
+
+    def title(self, obj=None):
+        return 'Yatube: последние обновления на сайте'
+
+    def link(self, obj=None):
+        return reverse('posts:index')
+
+    def description(self, obj=None):
+        return 'Новые записи всех авторов Yatube.'
+
+    def posts(self, obj=None):
+        return Post.objects.all()
+
+    def items(self, obj=None):
+        return self.posts(obj).for_feed().order_by(
+            '-pub_date', '-pk'
+        )[:settings.FEED_ITEMS]
+
+    def item_title(self, post):
+        return Truncator(post.text).words(settings.FEED_TITLE_WORDS)
+
+    def item_description(self, post):
+        return linebreaks(post.text, autoescape=True)
+
+    def item_link(self, post):
+        return reverse('posts:post_detail', args=[post.pk])
+
+    def item_author_name(self, post):
+        return _author_name(post.author)
+
+    def item_pubdate(self, post):
+        return post.pub_date
+
+    def item_updateddate(self, post):
+        return post.updated
+
+    def item_categories(self, post):
+        return [post.group.title] if post.group else []
+
+
+class GroupPostsFeed(LatestPostsFeed):
+    """RSS записей сообщества."""
+
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, group):
+        return f'Yatube: записи сообщества {group.title}'
+
+    def link(self, group):
+        return reverse('posts:group_list', args=[group.slug])
+
+    def description(self, group):
+        return group.description
+
+    def posts(self, group):
+        return group.posts.all()
+
+
+class AuthorPostsFeed(LatestPostsFeed):
+    """RSS записей автора."""
+
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, author):
+        return f'Yatube: записи пользователя {_author_name(author)}'
+
+    def link(self, author):
+        return reverse('posts:profile', args=[author.username])
+
+    def description(self, author):
+        return f'Все посты пользователя {_author_name(author)}.'
+
+    def posts(self, author):
+        return author.posts.all()
+
+
+class AtomMixin:
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj=None):
+        return self.description(obj)
+
+
+class LatestPostsAtomFeed(AtomMixin, LatestPostsFeed):
+    pass
+
+
+class GroupPostsAtomFeed(AtomMixin, GroupPostsFeed):
+    pass
+
+
+class AuthorPostsAtomFeed(AtomMixin, AuthorPostsFeed):
+    pass
+
+
+def _conditional(feed, scopes, etag, last_modified):
+    """Лента с областями и валидаторами тех же страниц, что и в HTML.
+
+    Дата изменения считается по updated постов и смене поколений
+    области ленты, поэтому правка поста тоже сбрасывает 304, а правки
+    в чужих группах и у других авторов — нет.
+    """
+    return page_scopes(scopes)(
+        condition(etag_func=etag, last_modified_func=last_modified)(feed)
+    )
+
+
+index_rss = _conditional(
+    LatestPostsFeed(),
+    conditional.index_scopes,
+    conditional.index_etag, conditional.index_last_modified,
+)
+index_atom = _conditional(
+    LatestPostsAtomFeed(),
+    conditional.index_scopes,
+    conditional.index_etag, conditional.index_last_modified,
+)
+group_rss = _conditional(
+    GroupPostsFeed(),
+    conditional.group_scopes,
+    conditional.group_etag, conditional.group_last_modified,
+)
+group_atom = _conditional(
+    GroupPostsAtomFeed(),
+    conditional.group_scopes,
+    conditional.group_etag, conditional.group_last_modified,
+)
+profile_rss = _conditional(
+    AuthorPostsFeed(),
+    conditional.profile_scopes,
+    conditional.profile_etag, conditional.profile_last_modified,
+)
+profile_atom = _conditional(
+    AuthorPostsAtomFeed(),
+    conditional.profile_scopes,
+    conditional.profile_etag, conditional.profile_last_modified,
+)
@@ -0,0 +1,71 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image, ImageOps
+
+FORMATS = {
+    'JPEG': ('.jpg', 'image/jpeg'),
+    'PNG': ('.png', 'image/png'),
+}
+
+
+def _has_alpha(image):
+    return image.mode in ('RGBA', 'LA', 'PA') or (
+        image.mode == 'P' and 'transparency' in image.info
+    )
+
+
+def process_upload(upload):
+    """Уменьшает, поворачивает по EXIF и перекодирует загруженную картинку.
+
+    Размер проверяется по заголовку до декодирования. JPEG декодируется
+    сразу в уменьшенном масштабе (draft), поэтому память на загрузку
+    ограничена POST_IMAGE_MAX_PIXELS и POST_IMAGE_MAX_SIDE, а не весом
+    файла. Метаданные отбрасываются, результат — JPEG или, для картинок
+    с прозрачностью, PNG. Анимация сохраняется как есть. Файл, который
+    не удаётся декодировать до конца, отклоняется ValidationError.
+    """
+    try:
+        return _reencode(upload)
+    except (OSError, Image.DecompressionBombError) as error:
+        raise ValidationError(
+            'Не удалось прочитать изображение: файл повреждён.',
+            code='invalid_image',
+        ) from error
+
+
+def _reencode(upload):
+    upload.seek(0)
+    image = Image.open(upload)
+    width, height = image.size
+    if width * height > settings.POST_IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Изображение слишком большое: %(width)s×%(height)s пикселей.',
+            code='image_too_large',
+            params={'width': width, 'height': height},
+        )
+    if getattr(image, 'is_animated', False):
+        upload.seek(0)
+        return upload
+    max_side = settings.POST_IMAGE_MAX_SIDE
+    image.draft('RGB', (max_side, max_side))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((max_side, max_side), Image.LANCZOS)
+    if _has_alpha(image):
+        image, image_format = image.convert('RGBA'), 'PNG'
+        options = {'optimize': True}
+    else:
+        image, image_format = image.convert('RGB'), 'JPEG'
+        options = {
+            'quality': settings.POST_IMAGE_JPEG_QUALITY,
+            'optimize': True,
+            'progressive': True,
+        }
+    output = BytesIO()
+    image.save(output, image_format, **options)
+    extension, content_type = FORMATS[image_format]
+    name = os.path.splitext(os.path.basename(upload.name))[0] + extension
+    return SimpleUploadedFile(name, output.getvalue(), content_type)
@@ -0,0 +1,246 @@
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.cache import bump_generation
+
+from . import comment_stats, counts, stats, timeline
+from .models import Comment, Follow, Group, Post, User
+
+CHUNK_SIZE = 500
+KINDS = ('post', 'comment', 'follow')
+MODEL_KINDS = {Post: 'post', Comment: 'comment', Follow: 'follow'}
+
+
+def _next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def _chunks(values):
+    values = sorted(values)
+    for start in range(0, len(values), CHUNK_SIZE):
+        yield values[start:start + CHUNK_SIZE]
+
+
+def _required(row, key):
+    value = row.get(key)
+    if value in (None, ''):
+        raise ValueError(f'нет поля {key}')
+    return value
+
+
+def _date(value):
+    """Дата из ISO 8601; без часового пояса считается текущим поясом."""
+    if not value:
+        return timezone.now()
+    date = parse_datetime(str(value))
+    if date is None:
+        raise ValueError(f'неверная дата: {value}')
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date)
+    return date
+
+
+@contextmanager
+def explicit_dates():
+    """Отключает auto_now и auto_now_add: даты берутся из файла.
+
+    Меняет поля моделей на уровне процесса, поэтому годится только
+    для команд, а не для работающего сервера.
+    """
+    fields = [
+        Post._meta.get_field('pub_date'),
+        Post._meta.get_field('updated'),
+        Comment._meta.get_field('created'),
+    ]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Importer:
+    """Пакетная загрузка постов, комментариев и подписок.
+
+    Авторы и группы ищутся по словарям в памяти, неизвестные авторы
+    создаются. Строки копятся и пишутся bulk_create пачками по
+    batch_size, каждая пачка в своей транзакции. Посты и пользователи
+    получают явные id, чтобы на них сразу могли ссылаться следующие
+    строки. Сигналы при этом не отправляются: статистика, счётчики
+    комментариев, ленты и кеш пересчитываются один раз в finish().
+    """
+
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self.users = dict(User.objects.values_list('username', 'pk'))
+        self.groups = dict(Group.objects.values_list('slug', 'pk'))
+        self.posts = {}
+        self.next_user_id = _next_id(User)
+        self.next_post_id = _next_id(Post)
+        self.pending = {User: [], Post: [], Comment: [], Follow: []}
+        self.imported = dict.fromkeys(KINDS, 0)
+        self.failed = []
+        self.rejected = 0
+        self.authors = set()
+        self.touched_groups = set()
+        self.touched_users = set()
+        self.commented = set()
+        self.followers = set()
+
+    def add(self, row):
+        """Принимает строку-словарь; ValueError для строки с ошибкой."""
+        if not isinstance(row, dict):
+            raise ValueError('строка должна быть объектом')
+        kind = row.get('type') or 'post'
+        if kind not in KINDS:
+            raise ValueError(f'неизвестный тип строки: {kind}')
+        getattr(self, f'_add_{kind}')(row)
+        self.imported[kind] += 1
+        if sum(map(len, self.pending.values())) >= self.batch_size:
+            self.flush()
+
+    @staticmethod
+    def _username(row, key):
+        username = str(_required(row, key))
+        if len(username) > User._meta.get_field('username').max_length:
+            raise ValueError(f'слишком длинное имя: {username}')
+        return username
+
+    def _user_id(self, username):
+        pk = self.users.get(username)
+        if pk is None:
+            pk = self.users[username] = self.next_user_id
+            self.next_user_id += 1
+            self.pending[User].append(User(
+                id=pk, username=username, password=make_password(None)
+            ))
+        return pk
+
+    def _add_post(self, row):
+        text = _required(row, 'text')
+        group_id = None
+        if row.get('group'):
+            group_id = self.groups.get(row['group'])
+            if group_id is None:
+                raise ValueError(f'неизвестная группа: {row["group"]}')
+        pub_date = _date(row.get('pub_date'))
+        image = str(row.get('image') or '')
+        if len(image) > Post._meta.get_field('image').max_length:
+            raise ValueError(f'слишком длинное имя картинки: {image}')
+        author_id = self._user_id(self._username(row, 'author'))
+        pk = self.next_post_id
+        self.next_post_id += 1
+        if row.get('id') not in (None, ''):
+            self.posts[str(row['id'])] = pk
+        self.pending[Post].append(Post(
+            id=pk, author_id=author_id, group_id=group_id, text=text,
+            image=image, pub_date=pub_date, updated=pub_date,
+        ))
+        self.authors.add(author_id)
+        if group_id is not None:
+            self.touched_groups.add(group_id)
+
+    def _add_comment(self, row):
+        post_id = self.posts.get(str(_required(row, 'post')))
+        if post_id is None:
+            raise ValueError(f'неизвестный пост: {row["post"]}')
+        text = _required(row, 'text')
+        created = _date(row.get('created'))
+        username = self._username(row, 'author')
+        self.pending[Comment].append(Comment(
+            post_id=post_id,
+            author_id=self._user_id(username),
+            text=text,
+            created=created,
+        ))
+        self.commented.add(post_id)
+
+    def _add_follow(self, row):
+        username = self._username(row, 'user')
+        author = self._username(row, 'author')
+        if username == author:
+            raise ValueError('подписка на самого себя')
+        user_id, author_id = self._user_id(username), self._user_id(author)
+        self.pending[Follow].append(
+            Follow(user_id=user_id, author_id=author_id)
+        )
+        self.followers.add(user_id)
+        self.touched_users.update((user_id, author_id))
+
+    def flush(self):
+        """Пишет накопленные строки одной транзакцией."""
+        try:
+            with explicit_dates(), transaction.atomic():
+                for model, rows in self.pending.items():
+                    model.objects.bulk_create(
+                        rows, ignore_conflicts=model is Follow
+                    )
+        except IntegrityError as error:
+            self._discard(error)
+        self.pending = {model: [] for model in self.pending}
+
+    def _discard(self, error):
+        """Забывает откатившуюся пачку и сдвигает id за занятые."""
+        lost_users = {user.pk for user in self.pending[User]}
+        lost_posts = {post.pk for post in self.pending[Post]}
+        self.users = {
+            name: pk for name, pk in self.users.items()
+            if pk not in lost_users
+        }
+        self.posts = {
+            key: pk for key, pk in self.posts.items()
+            if pk not in lost_posts
+        }
+        rows = 0
+        for model, kind in MODEL_KINDS.items():
+            self.imported[kind] -= len(self.pending[model])
+            rows += len(self.pending[model])
+        self.rejected += rows
+        self.failed.append(f'пачка из {rows} строк не записана: {error}')
+        self.next_user_id = max(self.next_user_id, _next_id(User))
+        self.next_post_id = max(self.next_post_id, _next_id(Post))
+
+    def finish(self):
+        """Дописывает остаток и пересчитывает то, что делали бы сигналы."""
+        self.flush()
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                no_style(), [User, Post]
+            ):
+                cursor.execute(sql)
+        for chunk in _chunks(self.authors | self.touched_users):
+            stats.rebuild(User.objects.filter(pk__in=chunk))
+        for chunk in _chunks(self.commented):
+            posts = Post.objects.filter(pk__in=chunk)
+            comment_stats.refresh(posts)
+            for author_id, group_id in posts.values_list(
+                'author_id', 'group_id'
+            ):
+                self.authors.add(author_id)
+                if group_id is not None:
+                    self.touched_groups.add(group_id)
+        followers = set(self.followers)
+        for chunk in _chunks(self.authors):
+            followers.update(Follow.objects.filter(
+                author_id__in=chunk
+            ).values_list('user_id', flat=True))
+        for user_id in sorted(followers):
+            timeline.rebuild(user_id)
+        counts.reconcile()
+        authors = self.authors | self.touched_users
+        bump_generation(
+            ('posts',),
+            *(('author', pk) for pk in authors),
+            *(('author', pk, 'info') for pk in authors),
+            *(('group', pk) for pk in self.touched_groups),
+            *(('post', pk) for pk in self.commented),
+        )
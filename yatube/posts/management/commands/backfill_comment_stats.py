@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts import comment_stats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает число комментариев и последний комментарий постов.'
+
+    def handle(self, *args, **options):
+        updated = comment_stats.refresh()
+        self.stdout.write(f'Обновлено постов: {updated}')
@@ -0,0 +1,166 @@
+import json
+import random
+import statistics
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from faker import Faker
+from mixer.backend.django import mixer
+
+from posts import comment_stats, stats
+from posts.models import Comment, Follow, Group, Post, User
+
+BENCH_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'bench',
+    }
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержку index, group_list, profile, post_detail и '
+        'follow_index на детерминированном наборе данных: p50/p95/p99, '
+        'число запросов и размер ответа. Данные откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=50_000)
+        parser.add_argument('--comments', type=int, default=500)
+        parser.add_argument('--follows', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--warm', action='store_true',
+            help='Не очищать кеш перед каждым запросом.'
+        )
+        parser.add_argument(
+            '--output', help='Файл для результатов в формате JSON.'
+        )
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 2:
+            raise CommandError('--repeat должен быть не меньше 2.')
+        if min(options['users'] - 1, options['groups'], options['posts']) < 1:
+            raise CommandError(
+                'Нужны хотя бы два пользователя, одна группа и один пост.'
+            )
+        with override_settings(CACHES=BENCH_CACHES), transaction.atomic():
+            pages, member = self.seed(options)
+            guest = Client(SERVER_NAME='localhost')
+            logged_in = Client(SERVER_NAME='localhost')
+            logged_in.force_login(member)
+            views = {}
+            for name, url in pages.items():
+                client = logged_in if name == 'follow_index' else guest
+                views[name] = self.measure(client, url, options)
+            transaction.set_rollback(True)
+        report = {
+            'dataset': {
+                key: options[key]
+                for key in ('seed', 'users', 'groups', 'posts', 'comments',
+                            'follows')
+            },
+            'repeat': options['repeat'],
+            'cache': 'warm' if options['warm'] else 'cold',
+            'views': views,
+        }
+        for name, result in views.items():
+            self.stdout.write(
+                f'{name:>12}: p50 {result["p50_ms"]:8.2f} ms  '
+                f'p95 {result["p95_ms"]:8.2f} ms  '
+                f'p99 {result["p99_ms"]:8.2f} ms  '
+                f'{result["queries"]:3} запросов  {result["bytes"]:7} байт'
+            )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
+
+    def seed(self, options):
+        """Создаёт набор данных и возвращает адреса страниц и подписчика."""
+        random.seed(options['seed'])
+        Faker.seed(options['seed'])
+        users = mixer.cycle(options['users']).blend(
+            User, username=mixer.sequence('bench_{0}')
+        )
+        groups = mixer.cycle(options['groups']).blend(
+            Group, slug=mixer.sequence('bench-{0}')
+        )
+        member, authors = users[0], users[1:]
+        with mixer.ctx(commit=False):
+            for start in range(0, options['posts'], options['batch_size']):
+                size = min(options['batch_size'], options['posts'] - start)
+                Post.objects.bulk_create(mixer.cycle(size).blend(
+                    Post,
+                    author=(random.choice(authors) for _ in range(size)),
+                    group=(
+                        random.choice(groups + [None]) for _ in range(size)
+                    ),
+                    image='',
+                ))
+        post = Post.objects.filter(author=authors[0]).latest('pub_date', 'pk')
+        with mixer.ctx(commit=False):
+            Comment.objects.bulk_create(mixer.cycle(options['comments']).blend(
+                Comment,
+                post=post,
+                author=(
+                    random.choice(users)
+                    for _ in range(options['comments'])
+                ),
+            ))
+        for author in random.sample(
+            authors, min(options['follows'], len(authors))
+        ):
+            Follow.objects.create(user=member, author=author)
+        stats.rebuild()
+        comment_stats.refresh(Post.objects.filter(pk=post.pk))
+        pages = {
+            'index': reverse('posts:index'),
+            'group_list': reverse(
+                'posts:group_list', kwargs={'slug': groups[0].slug}
+            ),
+            'profile': reverse(
+                'posts:profile', kwargs={'username': authors[0].username}
+            ),
+            'post_detail': reverse(
+                'posts:post_detail', kwargs={'post_id': post.pk}
+            ),
+            'follow_index': reverse('posts:follow_index'),
+        }
+        return pages, member
+
+    def measure(self, client, url, options):
+        timings = []
+        queries = []
+        for number in range(options['warmup'] + options['repeat']):
+            if not options['warm']:
+                cache.clear()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(url)
+                elapsed = time.perf_counter() - started
+            if response.status_code != 200:
+                raise CommandError(f'{url}: ответ {response.status_code}')
+            if number >= options['warmup']:
+                timings.append(elapsed)
+                queries.append(len(captured))
+        cuts = statistics.quantiles(timings, n=100, method='inclusive')
+        return {
+            'url': url,
+            'p50_ms': round(cuts[49] * 1000, 3),
+            'p95_ms': round(cuts[94] * 1000, 3),
+            'p99_ms': round(cuts[98] * 1000, 3),
+            'mean_ms': round(statistics.mean(timings) * 1000, 3),
+            'queries': statistics.median_low(queries),
+            'bytes': len(response.content),
+        }
@@ -0,0 +1,78 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.db import transaction
+
+from posts.models import Post
+from posts.utils import KeysetPaginator, NEXT
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает стоимость первой и глубокой страницы ленты '
+        'для OFFSET- и keyset-паджинации. Данные откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page', type=int, default=5000)
+        parser.add_argument('--per-page', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        per_page = options['per_page']
+        deep_page = options['page']
+        with transaction.atomic():
+            self.seed(deep_page * per_page, options['batch_size'])
+            queryset = Post.objects.all()
+            results = {
+                'offset page 1': self.measure(
+                    lambda: self.offset_page(queryset, per_page, 1),
+                    options['repeat'],
+                ),
+                f'offset page {deep_page}': self.measure(
+                    lambda: self.offset_page(queryset, per_page, deep_page),
+                    options['repeat'],
+                ),
+            }
+            paginator = KeysetPaginator(queryset, per_page)
+            anchor = paginator.object_list[(deep_page - 1) * per_page - 1]
+            cursor = paginator.encode_cursor(anchor, NEXT)
+            results['keyset page 1'] = self.measure(
+                lambda: list(paginator.get_page(None)), options['repeat']
+            )
+            results[f'keyset page {deep_page}'] = self.measure(
+                lambda: list(paginator.get_page(cursor)), options['repeat']
+            )
+            transaction.set_rollback(True)
+        for name, median in results.items():
+            self.stdout.write(f'{name:>20}: {median * 1000:8.2f} ms')
+
+    def seed(self, total, batch_size):
+        missing = total - Post.objects.count()
+        if missing <= 0:
+            return
+        author = User.objects.create(username='bench_pagination')
+        for start in range(0, missing, batch_size):
+            Post.objects.bulk_create(
+                Post(author=author, text=f'Пост {number}')
+                for number in range(start, min(start + batch_size, missing))
+            )
+
+    @staticmethod
+    def offset_page(queryset, per_page, number):
+        return list(Paginator(queryset, per_page).page(number))
+
+    @staticmethod
+    def measure(func, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings)
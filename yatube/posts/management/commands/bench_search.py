@@ -0,0 +1,83 @@
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import search
+from posts.models import Post
+
+User = get_user_model()
+
+WORDS = (
+    'кошка собака город река лес море солнце дождь книга музыка '
+    'дорога дом сад поезд утро вечер зима лето друг работа'
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает поиск LIKE по тексту с полнотекстовым индексом FTS5 '
+        'на заданном числе постов. Данные откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        results = {}
+        with transaction.atomic():
+            self.seed(options['rows'], options['batch_size'])
+            for label, term in (('частое', WORDS[0]), ('редкое', 'метка777')):
+                for name, func in self.queries(term).items():
+                    results[f'{name} ({label})'] = self.measure(
+                        func, options['repeat']
+                    )
+            transaction.set_rollback(True)
+        for name, median in results.items():
+            self.stdout.write(f'{name:>28}: {median * 1000:9.2f} ms')
+
+    @staticmethod
+    def queries(term):
+        per_page = settings.POSTS_PER_PAGE
+        like = Post.objects.filter(text__icontains=term).order_by(
+            '-pub_date', '-pk'
+        )
+        paginator = search.SearchPaginator(search.search(term), per_page)
+        next_cursor = paginator.get_page(None).next_cursor
+        return {
+            'LIKE first page': lambda: list(like[:per_page]),
+            'LIKE count': like.count,
+            'FTS5 first page': lambda: list(paginator.get_page(None)),
+            'FTS5 next page': lambda: list(paginator.get_page(next_cursor)),
+            'FTS5 count': search.matching(
+                Post.objects.all(), search.fts_query(term)
+            ).count,
+        }
+
+    def seed(self, total, batch_size):
+        author = User.objects.create(username='bench_search')
+        generator = random.Random(0)
+        for start in range(0, total, batch_size):
+            Post.objects.bulk_create(
+                Post(
+                    author=author,
+                    text=' '.join(generator.choices(WORDS, k=12))
+                    + f' метка{number % 1000}',
+                )
+                for number in range(start, min(start + batch_size, total))
+            )
+
+    @staticmethod
+    def measure(func, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings)
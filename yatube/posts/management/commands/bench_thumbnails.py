@@ -0,0 +1,99 @@
+import shutil
+import statistics
+import tempfile
+import time
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from PIL import Image
+from sorl.thumbnail.kvstores.base import add_prefix
+
+from posts import thumbnails
+from posts.models import Post
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает поиск миниатюр страницы по одной и пакетом: время '
+        'и число запросов на холодном и тёплом кеше. Данные откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--per-page', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        media_root = tempfile.mkdtemp()
+        self.keys = []
+        try:
+            with override_settings(MEDIA_ROOT=media_root):
+                with transaction.atomic():
+                    images = self.seed(options['per_page'])
+                    self.report(images, options['repeat'])
+                    transaction.set_rollback(True)
+        finally:
+            shutil.rmtree(media_root, ignore_errors=True)
+            self.forget()
+
+    def forget(self):
+        """Убирает из кеша только записи sorl для тестовых картинок."""
+        cache.delete_many(self.keys)
+
+    def seed(self, count):
+        author = User.objects.create(username='bench_thumbnails')
+        buffer = BytesIO()
+        Image.new('RGB', (1200, 800), 'gray').save(buffer, 'JPEG')
+        images = []
+        for number in range(count):
+            post = Post(author=author, text=f'Пост {number}')
+            post.image.save(
+                f'bench_{number}.jpg', ContentFile(buffer.getvalue()),
+                save=False,
+            )
+            post.save()
+            thumbnails.generate(post.pk)
+            images.append(post.image)
+            self.keys.extend(
+                add_prefix(thumbnails.thumbnail_file(post.image, variant).key)
+                for variant in thumbnails.variants()
+            )
+        return images
+
+    def report(self, images, repeat):
+        approaches = {
+            'per tag': lambda: [thumbnails.lookup(image) for image in images],
+            'batched': lambda: thumbnails.lookup_many(images),
+        }
+        for name, func in approaches.items():
+            for state in ('cold', 'warm'):
+                clear = state == 'cold'
+                queries = self.count_queries(func, clear)
+                median = self.measure(func, repeat, clear)
+                self.stdout.write(
+                    f'{name:>8} {state}: {median * 1000:7.3f} ms, '
+                    f'{queries} queries'
+                )
+
+    def count_queries(self, func, clear):
+        if clear:
+            self.forget()
+        with CaptureQueriesContext(connection) as queries:
+            func()
+        return len(queries)
+
+    def measure(self, func, repeat, clear):
+        timings = []
+        for _ in range(repeat):
+            if clear:
+                self.forget()
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings)
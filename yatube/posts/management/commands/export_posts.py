@@ -0,0 +1,49 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export
+from posts.models import Group, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает посты и комментарии автора или группы в JSON Lines, '
+        'с --media — zip вместе с картинками. Пишет потоком.'
+    )
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--author', help='Имя пользователя.')
+        target.add_argument('--group', help='Slug группы.')
+        parser.add_argument('--media', action='store_true')
+        parser.add_argument(
+            '--output', '-o', default='-',
+            help="Файл для выгрузки; '-' — stdout."
+        )
+
+    def handle(self, *args, **options):
+        if options['author']:
+            owner = User.objects.filter(username=options['author']).first()
+            select = export.author_content
+        else:
+            owner = Group.objects.filter(slug=options['group']).first()
+            select = export.group_content
+        if owner is None:
+            raise CommandError('Автор или группа не найдены.')
+        content = select(owner)
+        if options['media']:
+            chunks = export.zip_stream(*content)
+        else:
+            chunks = export.jsonl(export.rows(*content))
+        if options['output'] == '-':
+            self.write(sys.stdout.buffer, chunks)
+            sys.stdout.buffer.flush()
+            return
+        with open(options['output'], 'wb') as output:
+            self.write(output, chunks)
+
+    @staticmethod
+    def write(output, chunks):
+        for chunk in chunks:
+            output.write(chunk)
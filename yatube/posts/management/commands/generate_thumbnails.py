@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Строит недостающие миниатюры постов с картинками.'
+
+    def handle(self, *args, **options):
+        built = 0
+        posts = Post.objects.exclude(image='').only('image').order_by('pk')
+        for post in posts.iterator():
+            if None in thumbnails.lookup(post.image).values():
+                thumbnails.generate(post.pk)
+                built += 1
+        self.stdout.write(f'Построено миниатюр: {built}')
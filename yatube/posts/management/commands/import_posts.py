@@ -0,0 +1,109 @@
+import csv
+import json
+import sys
+import time
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.importer import KINDS, Importer
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает посты, комментарии и подписки из JSONL или CSV, '
+        'из файла или stdin. Тип строки задаёт поле type. Поле image — '
+        'имя файла в MEDIA_ROOT: файлы из media/ архива export_posts '
+        'копируются туда заранее, миниатюры строит generate_thumbnails. '
+        'Id пользователей и постов выдаются заранее, поэтому сайт на время '
+        'импорта лучше перевести в режим обслуживания: пачка, чьи id '
+        'заняты новыми записями, пропускается с сообщением в stderr.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Файл или '-' для stdin.")
+        parser.add_argument(
+            '--format', choices=('jsonl', 'csv'),
+            help='По умолчанию определяется по расширению файла.'
+        )
+        parser.add_argument(
+            '--type', choices=KINDS, default='post',
+            help='Тип строк без поля type.'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--max-errors', type=int, default=100)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or (
+            'csv' if path.lower().endswith('.csv') else 'jsonl'
+        )
+        importer = Importer(options['batch_size'])
+        started = time.perf_counter()
+        with self.open_input(path) as lines:
+            rows, errors = self.load(importer, lines, file_format, options)
+            importer.finish()
+        for failure in importer.failed:
+            self.stderr.write(failure)
+        errors += importer.rejected
+        imported = importer.imported
+        self.stdout.write(
+            f'Постов: {imported["post"]}, '
+            f'комментариев: {imported["comment"]}, '
+            f'подписок: {imported["follow"]}, пропущено строк: {errors}'
+        )
+        self.progress(rows, started)
+        if errors > options['max_errors']:
+            raise CommandError(
+                f'Больше {options["max_errors"]} ошибок, импорт остановлен '
+                f'после строки {rows}.'
+            )
+
+    @staticmethod
+    def open_input(path):
+        if path == '-':
+            return nullcontext(sys.stdin)
+        try:
+            return open(path, encoding='utf-8', newline='')
+        except OSError as error:
+            raise CommandError(error)
+
+    def load(self, importer, lines, file_format, options):
+        """Передаёт записи импортёру; возвращает число строк и ошибок."""
+        rows = errors = 0
+        started = time.perf_counter()
+        for number, row in self.rows(lines, file_format):
+            rows += 1
+            try:
+                if isinstance(row, str):
+                    row = json.loads(row)
+                if isinstance(row, dict) and not row.get('type'):
+                    row['type'] = options['type']
+                importer.add(row)
+            except ValueError as error:
+                errors += 1
+                self.stderr.write(f'Строка {number}: {error}')
+                if errors > options['max_errors']:
+                    break
+            if options['verbosity'] > 1 and rows % 100_000 == 0:
+                self.progress(rows, started)
+        return rows, errors
+
+    @staticmethod
+    def rows(lines, file_format):
+        """Пары (номер строки, запись); JSON разбирается в load."""
+        if file_format == 'csv':
+            reader = csv.DictReader(lines)
+            for row in reader:
+                yield reader.line_num, row
+            return
+        for number, line in enumerate(lines, 1):
+            if line.strip():
+                yield number, line
+
+    def progress(self, rows, started):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'Строк: {rows} за {elapsed:.1f} с, '
+            f'{rows / elapsed if elapsed else 0:.0f} строк/с'
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts import counts
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает закешированные счётчики постов. '
+        'Рассчитан на периодический запуск из cron.'
+    )
+
+    def handle(self, *args, **options):
+        updated = counts.reconcile()
+        self.stdout.write(f'Обновлено счётчиков: {len(updated)}')
@@ -0,0 +1,61 @@
+import logging
+import os
+
+from django.db import transaction
+from sorl.thumbnail import delete
+from sorl.thumbnail.images import ImageFile
+
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+
+def _storage():
+    return Post._meta.get_field('image').storage
+
+
+def image_file(name):
+    """ImageFile sorl для картинки поста в хранилище поля image."""
+    return ImageFile(name, _storage())
+
+
+def _in_use(name):
+    return (
+        _storage().is_claimed(name)
+        or Post.objects.filter(image=name).exists()
+    )
+
+
+def settle(name):
+    """Снимает отметку загрузки после фиксации ссылки на картинку."""
+    if name:
+        transaction.on_commit(lambda: _storage().settle(name))
+
+
+def release(name):
+    """Удаляет картинку и её миниатюры, если на неё не ссылается ни один пост.
+
+    Ссылки считаются по базе после фиксации транзакции, поэтому общий
+    для нескольких постов файл живёт, пока жив последний из них.
+    Файл, который параллельная загрузка успела выбрать по хешу, но ещё
+    не записала в базу, возвращается на место.
+    """
+    if not name:
+        return
+
+    def collect():
+        if _in_use(name):
+            return
+        storage = _storage()
+        try:
+            retired = storage.retire(name)
+            if retired is not None and _in_use(name):
+                storage.restore(name, retired)
+                return
+            delete(image_file(name), delete_file=False)
+            if retired is not None:
+                os.remove(retired)
+        except Exception:
+            logger.exception('Не удалось удалить картинку %s', name)
+
+    transaction.on_commit(collect)
@@ -0,0 +1,51 @@
+from django.db import migrations
+
+TABLE = 'posts_post_fts'
+
+CREATE = (
+    f'CREATE VIRTUAL TABLE {TABLE} USING fts5('
+    f"text, content='posts_post', content_rowid='id', "
+    f"tokenize='unicode61 remove_diacritics 2')"
+)
+
+TRIGGERS = (
+    f'CREATE TRIGGER {TABLE}_insert AFTER INSERT ON posts_post BEGIN '
+    f'INSERT INTO {TABLE}(rowid, text) VALUES (new.id, new.text); END',
+    f'CREATE TRIGGER {TABLE}_delete AFTER DELETE ON posts_post BEGIN '
+    f"INSERT INTO {TABLE}({TABLE}, rowid, text) "
+    f"VALUES ('delete', old.id, old.text); END",
+    f'CREATE TRIGGER {TABLE}_update AFTER UPDATE OF text ON posts_post '
+    f"BEGIN INSERT INTO {TABLE}({TABLE}, rowid, text) "
+    f"VALUES ('delete', old.id, old.text); "
+    f'INSERT INTO {TABLE}(rowid, text) VALUES (new.id, new.text); END',
+)
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(CREATE)
+    for statement in TRIGGERS:
+        schema_editor.execute(statement)
+    schema_editor.execute(
+        f"INSERT INTO {TABLE}({TABLE}) VALUES ('rebuild')"
+    )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for suffix in ('insert', 'delete', 'update'):
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {TABLE}_{suffix}')
+    schema_editor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_post_image_storage'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
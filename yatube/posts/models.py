@@ -2,6 +2,8 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.conf import settings
 
+from core.storage import ContentAddressedStorage
+
 User = get_user_model()
 
 
@@ -14,6 +16,26 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты для карточек ленты: автор и группа в том же запросе."""
+        return self.select_related(
+            'author', 'group', 'last_comment__author'
+        ).only(
+            'text', 'pub_date', 'updated', 'image', 'comment_count',
+            'author__username', 'author__first_name', 'author__last_name',
+            'group__slug', 'group__title',
+            'last_comment__text', 'last_comment__author__username',
+        )
+
+    def for_timeline(self, user):
+        """Посты ленты подписок в порядке индекса записей ленты."""
+        return self.for_feed().filter(timeline_entries__user=user).annotate(
+            entry_date=models.F('timeline_entries__pub_date'),
+            entry_post=models.F('timeline_entries__post'),
+        )
+
+
 class Post(models.Model):
     text = models.TextField(
         'Текст поста',
@@ -21,7 +43,12 @@ class Post(models.Model):
     )
     pub_date = models.DateTimeField(
         'Дата публикации',
-        auto_now_add=True
+        auto_now_add=True,
+        db_index=True
+    )
+    updated = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True
     )
     author = models.ForeignKey(
         User,
@@ -41,16 +68,58 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=ContentAddressedStorage(),
         blank=True
     )
+    comment_count = models.PositiveIntegerField(
+        'Число комментариев',
+        default=0,
+        editable=False
+    )
+    last_comment = models.ForeignKey(
+        'Comment',
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        editable=False,
+        related_name='+',
+        verbose_name='Последний комментарий'
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_date_idx'
+            ),
+            models.Index(fields=['-updated'], name='post_updated_idx'),
+            models.Index(
+                fields=['author', '-updated'], name='post_author_updated_idx'
+            ),
+            models.Index(
+                fields=['group', '-updated'], name='post_group_updated_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:settings.CHARS_IN_STR]
 
 
+class CommentQuerySet(models.QuerySet):
+    def for_thread(self):
+        """Комментарии для ветки под постом вместе с автором."""
+        return self.select_related('author').only(
+            'text', 'created', 'post', 'author__username'
+        )
+
+
 class Comment(models.Model):
     post = models.ForeignKey(
         Post,
@@ -73,8 +142,16 @@ class Comment(models.Model):
         auto_now_add=True
     )
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created']
+        indexes = [
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='comment_post_created_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:settings.CHARS_IN_STR]
@@ -96,3 +173,54 @@ class Follow(models.Model):
 
     class Meta:
         unique_together = ['user', 'author']
+        indexes = [
+            models.Index(
+                fields=['author', 'user'], name='follow_author_user_idx'
+            ),
+        ]
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь'
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+
+    class Meta:
+        verbose_name = 'Статистика пользователя'
+        verbose_name_plural = 'Статистика пользователей'
+
+    def __str__(self):
+        return str(self.user_id)
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Подписчик'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        ordering = ['-pub_date']
+        unique_together = ['user', 'post']
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_date_idx'
+            ),
+        ]
@@ -0,0 +1,94 @@
+import re
+
+from .models import Post
+from .utils import KeysetPaginator
+
+TABLE = 'posts_post_fts'
+MAX_TERMS = 10
+SEARCH_ORDERING = ('rank', 'pk')
+
+# Триггеры теряются, когда миграция SQLite пересоздаёт posts_post,
+# поэтому post_migrate ставит их заново через ensure_triggers().
+TRIGGERS = (
+    f'CREATE TRIGGER IF NOT EXISTS {TABLE}_insert '
+    f'AFTER INSERT ON posts_post BEGIN '
+    f'INSERT INTO {TABLE}(rowid, text) VALUES (new.id, new.text); END',
+    f'CREATE TRIGGER IF NOT EXISTS {TABLE}_delete '
+    f'AFTER DELETE ON posts_post BEGIN '
+    f"INSERT INTO {TABLE}({TABLE}, rowid, text) "
+    f"VALUES ('delete', old.id, old.text); END",
+    f'CREATE TRIGGER IF NOT EXISTS {TABLE}_update '
+    f'AFTER UPDATE OF text ON posts_post BEGIN '
+    f"INSERT INTO {TABLE}({TABLE}, rowid, text) "
+    f"VALUES ('delete', old.id, old.text); "
+    f'INSERT INTO {TABLE}(rowid, text) VALUES (new.id, new.text); END',
+)
+
+
+def ensure_triggers(connection):
+    """Создаёт триггеры синхронизации, если индекс уже есть в базе."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+            [TABLE],
+        )
+        if cursor.fetchone() is None:
+            return
+        for statement in TRIGGERS:
+            cursor.execute(statement)
+
+
+def fts_query(text):
+    """Превращает ввод пользователя в запрос FTS5 из слов в кавычках.
+
+    Операторы FTS5 не интерпретируются, все слова должны встретиться.
+    Пустая строка означает, что искать нечего.
+    """
+    terms = re.findall(r'\w+', text)[:MAX_TERMS]
+    return ' '.join(f'"{term}"' for term in terms)
+
+
+def matching(queryset, query):
+    """Оставляет в queryset постов только подходящие под запрос FTS5."""
+    return queryset.extra(
+        where=[
+            f'posts_post.id IN '
+            f'(SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s)'
+        ],
+        params=[query],
+    )
+
+
+def search(text):
+    """Посты, найденные по тексту, с релевантностью bm25 в поле rank."""
+    query = fts_query(text)
+    if not query:
+        return Post.objects.none()
+    return Post.objects.for_feed().extra(
+        select={'rank': f'{TABLE}.rank'},
+        tables=[TABLE],
+        where=[f'{TABLE}.rowid = posts_post.id', f'{TABLE} MATCH %s'],
+        params=[query],
+    ).order_by(*SEARCH_ORDERING)
+
+
+class SearchPaginator(KeysetPaginator):
+    """Keyset-паджинатор по (rank, pk) для результатов поиска."""
+
+    def __init__(self, object_list, per_page):
+        super().__init__(object_list, per_page, ordering=SEARCH_ORDERING)
+
+    def _after(self, queryset, values, forward):
+        rank, pk = values
+        if not isinstance(rank, (int, float)) or not isinstance(pk, int):
+            return queryset.none()
+        operator = '>' if forward else '<'
+        return queryset.extra(
+            where=[
+                f'({TABLE}.rank {operator} %s OR '
+                f'({TABLE}.rank = %s AND posts_post.id {operator} %s))'
+            ],
+            params=[rank, rank, pk],
+        )
@@ -0,0 +1,222 @@
+import threading
+
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.db.models.signals import (post_delete, post_migrate, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.cache import bump_generation
+
+from . import (comment_stats, conditional, counts, media, search, stats,
+               thumbnails, timeline)
+from .models import Comment, Follow, Group, Post, User
+
+CARD_USER_FIELDS = {'username', 'first_name', 'last_name'}
+
+_deleting = threading.local()
+
+
+def _deleting_posts():
+    if not hasattr(_deleting, 'posts'):
+        _deleting.posts = set()
+    return _deleting.posts
+
+
+def post_scopes(post, *group_ids):
+    """Области страниц и лент, где показана карточка поста."""
+    scopes = [('posts',), ('post', post.pk), ('author', post.author_id)]
+    scopes.extend(
+        ('group', group_id) for group_id in group_ids if group_id is not None
+    )
+    return scopes
+
+
+@receiver(post_migrate)
+def install_search_triggers(sender, using, **kwargs):
+    if sender.name == 'posts':
+        search.ensure_triggers(connections[using])
+
+
+@receiver(request_started)
+def defer_thumbnails(sender, **kwargs):
+    thumbnails.start_deferring()
+
+
+@receiver(request_started)
+def forget_deleting_posts(sender, **kwargs):
+    # Отметка остаётся, только если удаление поста упало с ошибкой.
+    _deleting_posts().clear()
+
+
+@receiver(request_finished)
+def build_deferred_thumbnails(sender, **kwargs):
+    thumbnails.run_deferred()
+
+
+@receiver(pre_save, sender=User)
+def remember_card_fields(sender, instance, update_fields, **kwargs):
+    """Отмечает, поменялось ли что-то из показанного в карточках поста."""
+    fields = CARD_USER_FIELDS
+    if update_fields is not None:
+        fields = fields & set(update_fields)
+    if instance.pk is None or not fields:
+        instance._card_changed = False
+        return
+    fields = sorted(fields)
+    previous = User.objects.filter(pk=instance.pk).values_list(
+        *fields
+    ).first()
+    instance._card_changed = previous is not None and previous != tuple(
+        getattr(instance, field) for field in fields
+    )
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    conditional.forget('author', instance.username)
+    if created:
+        stats.user_created(instance)
+        return
+    if getattr(instance, '_card_changed', False):
+        instance.posts.update(updated=timezone.now())
+        bump_generation(
+            ('posts',),
+            ('author', instance.pk),
+            ('author', instance.pk, 'info'),
+            *(('group', group_id) for group_id in instance.posts.filter(
+                group__isnull=False
+            ).order_by().values_list('group_id', flat=True).distinct()),
+        )
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    conditional.forget('author', instance.username)
+    bump_generation(('author', instance.pk), ('author', instance.pk, 'info'))
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous(sender, instance, **kwargs):
+    if instance.pk is None:
+        return
+    instance._previous_group_id, instance._previous_image = (
+        Post.objects.filter(pk=instance.pk).values_list(
+            'group_id', 'image'
+        ).first() or (None, None)
+    )
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    previous_group_id = getattr(instance, '_previous_group_id', None)
+    scopes = post_scopes(instance, instance.group_id, previous_group_id)
+    if created:
+        scopes.append(('author', instance.author_id, 'info'))
+    bump_generation(*scopes)
+    previous_image = getattr(instance, '_previous_image', None)
+    if instance.image and (created or instance.image.name != previous_image):
+        media.settle(instance.image.name)
+        thumbnails.schedule(instance)
+    if previous_image and previous_image != instance.image.name:
+        media.release(previous_image)
+    if created:
+        counts.post_added(instance)
+        stats.post_added(instance)
+        counts.timelines_changed(timeline.fan_out(instance))
+        return
+    if previous_group_id != instance.group_id:
+        conditional.forget('post', instance.pk)
+        counts.post_regrouped(instance, previous_group_id)
+
+
+@receiver(pre_delete, sender=Post)
+def post_deleting(sender, instance, **kwargs):
+    """Каскадно удаляемые комментарии поста не пересчитывают его счётчики."""
+    _deleting_posts().add(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    _deleting_posts().discard(instance.pk)
+    conditional.forget('post', instance.pk)
+    bump_generation(
+        *post_scopes(instance, instance.group_id),
+        ('author', instance.author_id, 'info'),
+    )
+    counts.post_removed(instance)
+    stats.post_removed(instance)
+    media.release(instance.image.name)
+
+
+@receiver(pre_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def remember_group_authors(sender, instance, **kwargs):
+    if instance.pk is None:
+        return
+    instance._author_ids = list(Post.objects.filter(
+        group_id=instance.pk
+    ).order_by().values_list('author_id', flat=True).distinct())
+
+
+@receiver(pre_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def touch_group_posts(sender, instance, **kwargs):
+    if instance.pk is not None:
+        instance.posts.update(updated=timezone.now())
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    conditional.forget('group', instance.slug)
+    bump_generation(
+        ('posts',),
+        ('group', instance.pk),
+        ('group', instance.pk, 'info'),
+        *(('author', author_id)
+          for author_id in getattr(instance, '_author_ids', ())),
+    )
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    bump_generation(
+        ('author', instance.user_id), ('author', instance.author_id)
+    )
+    if created:
+        stats.follow_added(instance)
+        timeline.backfill(instance)
+        counts.timelines_changed([instance.user_id])
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    bump_generation(
+        ('author', instance.user_id), ('author', instance.author_id)
+    )
+    stats.follow_removed(instance)
+    timeline.prune(instance)
+    counts.timelines_changed([instance.user_id])
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        comment_stats.comment_added(instance)
+    bump_generation(*post_scopes(instance.post, instance.post.group_id))
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    if instance.post_id in _deleting_posts():
+        return
+    comment_stats.comment_removed(instance)
+    post = Post.objects.filter(pk=instance.post_id).only(
+        'author', 'group'
+    ).first()
+    if post is None:
+        bump_generation(('post', instance.post_id))
+        return
+    bump_generation(*post_scopes(post, post.group_id))
@@ -0,0 +1,80 @@
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Follow, Post, User, UserStats
+
+BATCH_SIZE = 500
+
+
+def _total(model, field):
+    totals = (
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(totals), 0)
+
+
+def rebuild(users=None):
+    """Пересчитывает строки статистики для пользователей целиком."""
+    if users is None:
+        users = User.objects.all()
+    rows = users.annotate(
+        posts_total=_total(Post, 'author'),
+        followers_total=_total(Follow, 'author'),
+        following_total=_total(Follow, 'user'),
+    ).values_list(
+        'pk', 'posts_total', 'followers_total', 'following_total'
+    )
+    stats = [
+        UserStats(
+            user_id=pk,
+            posts_count=posts,
+            followers_count=followers,
+            following_count=following,
+        )
+        for pk, posts, followers, following in rows.iterator()
+    ]
+    with transaction.atomic():
+        UserStats.objects.filter(user__in=users).delete()
+        UserStats.objects.bulk_create(stats, batch_size=BATCH_SIZE)
+    return len(stats)
+
+
+def adjust(user_id, **deltas):
+    """Атомарно меняет счётчики пользователя на заданные величины.
+
+    Если строки ещё нет, она создаётся пересчётом, но только при
+    увеличении: уменьшения приходят и при каскадном удалении
+    пользователя, когда создавать строку уже нельзя.
+    """
+    updated = UserStats.objects.filter(user_id=user_id).update(**{
+        field: F(field) + delta for field, delta in deltas.items()
+    })
+    if not updated and any(delta > 0 for delta in deltas.values()):
+        rebuild(User.objects.filter(pk=user_id))
+
+
+def user_created(user):
+    UserStats.objects.get_or_create(user=user)
+
+
+def post_added(post):
+    adjust(post.author_id, posts_count=1)
+
+
+def post_removed(post):
+    adjust(post.author_id, posts_count=-1)
+
+
+def follow_added(follow):
+    adjust(follow.user_id, following_count=1)
+    adjust(follow.author_id, followers_count=1)
+
+
+def follow_removed(follow):
+    adjust(follow.user_id, following_count=-1)
+    adjust(follow.author_id, followers_count=-1)
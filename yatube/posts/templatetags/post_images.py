@@ -0,0 +1,53 @@
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+PREFETCHED = 'post_thumbnails'
+SIZES = '(min-width: 960px) 960px, 100vw'
+CONTENT_TYPES = {
+    'WEBP': 'image/webp',
+    'JPEG': 'image/jpeg',
+    'PNG': 'image/png',
+}
+
+
+@register.simple_tag(takes_context=True)
+def prefetch_post_thumbnails(context, posts):
+    """Находит миниатюры всех постов страницы одним обращением к кешу."""
+    context[PREFETCHED] = thumbnails.lookup_many(
+        [post.image for post in posts]
+    )
+    return ''
+
+
+@register.inclusion_tag('posts/includes/picture.html', takes_context=True)
+def post_picture(context, image):
+    """Разметка <picture> с готовыми вариантами миниатюры.
+
+    В src попадает самый широкий вариант последнего формата (JPEG),
+    пока вариантов нет — оригинал.
+    """
+    prefetched = context.get(PREFETCHED, {})
+    if image.name in prefetched:
+        found = prefetched[image.name]
+    else:
+        found = thumbnails.lookup(image)
+    sources = {}
+    src = image.url
+    for variant, thumbnail in found.items():
+        if thumbnail is None:
+            continue
+        sources.setdefault(variant.format, []).append(
+            f'{thumbnail.url} {thumbnail.width}w'
+        )
+        src = thumbnail.url
+    return {
+        'src': src,
+        'sizes': SIZES,
+        'sources': [
+            {'type': CONTENT_TYPES[image_format], 'srcset': ', '.join(urls)}
+            for image_format, urls in sources.items()
+        ],
+    }
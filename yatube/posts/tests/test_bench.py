@@ -0,0 +1,30 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import Post
+
+
+class BenchCommandTests(TestCase):
+    def test_report_covers_feed_views(self):
+        """Команда bench пишет отчёт по каждой странице и откатывает данные."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.json')
+            call_command(
+                'bench', users=5, groups=2, posts=30, comments=3, follows=2,
+                repeat=2, warmup=0, output=path, stdout=StringIO(),
+            )
+            with open(path, encoding='utf-8') as report_file:
+                report = json.load(report_file)
+        self.assertEqual(set(report['views']), {
+            'index', 'group_list', 'profile', 'post_detail', 'follow_index'
+        })
+        for result in report['views'].values():
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+            self.assertGreater(result['queries'], 0)
+            self.assertGreater(result['bytes'], 0)
+        self.assertFalse(Post.objects.exists())
@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.cache import bump_generation
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+CARD_TEMPLATE = 'posts/includes/post_info.html'
+
+
+class PostCardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.first = Post.objects.create(
+            author=self.author, group=self.group, text='Первый пост'
+        )
+        self.second = Post.objects.create(
+            author=self.author, text='Второй пост'
+        )
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def rendered_cards(self, address):
+        response = self.client.get(address)
+        return response, [
+            template.name for template in response.templates
+        ].count(CARD_TEMPLATE)
+
+    def test_cards_survive_page_invalidation(self):
+        """После смены поколения страницы карточки берутся из кеша."""
+        self.client.get(reverse('posts:index'))
+        Post.objects.filter(pk=self.first.pk).update(text='Тихая правка')
+        bump_generation(('posts',))
+        response, rendered = self.rendered_cards(reverse('posts:index'))
+        self.assertEqual(rendered, 0)
+        self.assertContains(response, 'Первый пост')
+
+    def test_edit_rerenders_only_its_card(self):
+        """Правка поста через post_edit перерисовывает одну карточку."""
+        self.client.get(reverse('posts:index'))
+        self.client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.first.pk}),
+            data={'text': 'Исправленный пост', 'group': self.group.pk},
+        )
+        response, rendered = self.rendered_cards(reverse('posts:index'))
+        self.assertEqual(rendered, 1)
+        self.assertContains(response, 'Исправленный пост')
+        self.assertContains(response, 'Второй пост')
+
+    def test_card_dependencies_touch_updated(self):
+        """Комментарий, имя автора и название группы обновляют updated."""
+        def rename_author():
+            self.author.first_name = 'Анна'
+            self.author.save()
+
+        changes = {
+            'comment': lambda: Comment.objects.create(
+                post=self.first, author=self.author, text='Комментарий'
+            ),
+            'author': rename_author,
+            'group': self.group.save,
+        }
+        for name, change in changes.items():
+            with self.subTest(change=name):
+                before = Post.objects.get(pk=self.first.pk).updated
+                change()
+                self.assertGreater(
+                    Post.objects.get(pk=self.first.pk).updated, before
+                )
+
+    def test_login_does_not_touch_posts(self):
+        """Вход, смена пароля и сохранение без правок не трогают карточки."""
+        before = Post.objects.get(pk=self.first.pk).updated
+        self.author.save(update_fields=['last_login'])
+        self.author.set_password('new-password')
+        self.author.save()
+        self.author.save()
+        self.assertEqual(Post.objects.get(pk=self.first.pk).updated, before)
@@ -0,0 +1,71 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+class CommentStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Тестовый пост')
+
+    def comment(self, text):
+        return Comment.objects.create(
+            post=self.post, author=self.author, text=text
+        )
+
+    def test_counter_follows_comments(self):
+        """Счётчик и последний комментарий меняются вместе с комментариями."""
+        first = self.comment('Первый')
+        second = self.comment('Второй')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 2)
+        self.assertEqual(self.post.last_comment, second)
+        second.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        self.assertEqual(self.post.last_comment, first)
+        first.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+        self.assertIsNone(self.post.last_comment)
+
+    def test_post_delete_cost_does_not_grow_with_comments(self):
+        """Удаление поста не пересчитывает счётчики на каждый комментарий."""
+        queries = []
+        for comments in (1, 10):
+            post = Post.objects.create(author=self.author, text='Пост')
+            for number in range(comments):
+                Comment.objects.create(
+                    post=post, author=self.author, text=f'Комментарий {number}'
+                )
+            with CaptureQueriesContext(connection) as context:
+                post.delete()
+            queries.append(len(context))
+        self.assertEqual(queries[0], queries[1])
+        self.assertFalse(Comment.objects.filter(text__startswith='Комм'))
+
+    def test_backfill_command(self):
+        """Команда восстанавливает разошедшиеся значения."""
+        comment = self.comment('Комментарий')
+        Post.objects.update(comment_count=7, last_comment=None)
+        call_command('backfill_comment_stats', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        self.assertEqual(self.post.last_comment, comment)
+
+    def test_card_shows_comment_preview(self):
+        """Карточка в ленте показывает число и начало комментария."""
+        self.comment('Свежий комментарий')
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Комментариев: 1')
+        self.assertContains(response, 'author: Свежий комментарий')
@@ -0,0 +1,186 @@
+from contextlib import contextmanager
+from datetime import timedelta
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@contextmanager
+def clock_at(start, minutes):
+    """Ставит часы на start + minutes, чтобы шаги не делили секунду."""
+    moment = start + timedelta(minutes=minutes)
+    with mock.patch('django.utils.timezone.now', lambda: moment), \
+            mock.patch('core.cache.time.time', moment.timestamp):
+        yield
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Тестовый пост', group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.cookies['csrftoken'] = 'token'
+        self.addresses = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user.username}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        ]
+
+    def test_matching_etag_returns_not_modified(self):
+        """Совпавший ETag даёт 304 без отрисовки страницы."""
+        for address in self.addresses:
+            with self.subTest(address=address):
+                response = self.reader_client.get(address)
+                self.assertTrue(response.has_header('Last-Modified'))
+                with self.assertNumQueries(1):
+                    response = self.reader_client.get(
+                        address, HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+                self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_if_modified_since_returns_not_modified(self):
+        """Страница без новых постов не отдаётся повторно по дате."""
+        response = self.reader_client.get(self.addresses[0])
+        response = self.reader_client.get(
+            self.addresses[0],
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_edit_and_delete_change_last_modified(self):
+        """Правка и удаление поста не дают 304 по If-Modified-Since."""
+        post = Post.objects.create(
+            author=self.user, text='Пост для правки', group=self.group
+        )
+        detail = reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        changes = {
+            'edit': (self.addresses[0], lambda: post.save()),
+            'edit_detail': (detail, lambda: post.save()),
+            'delete': (self.addresses[1], lambda: post.delete()),
+        }
+        start = timezone.now()
+        for step, (name, (address, change)) in enumerate(changes.items()):
+            with self.subTest(change=name):
+                with clock_at(start, 2 * step + 1):
+                    last_modified = self.reader_client.get(address)[
+                        'Last-Modified'
+                    ]
+                with clock_at(start, 2 * step + 2):
+                    change()
+                    response = self.reader_client.get(
+                        address, HTTP_IF_MODIFIED_SINCE=last_modified
+                    )
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_cached_page_honours_etag(self):
+        """Страница из кеша анонимных страниц тоже отвечает 304."""
+        response = self.guest_client.get(self.addresses[0])
+        response = self.guest_client.get(
+            self.addresses[0], HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+
+    def test_new_comment_changes_post_etag(self):
+        """Новый комментарий меняет ETag страницы поста."""
+        address = self.addresses[-1]
+        etag = self.guest_client.get(address)['ETag']
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Комментарий'
+        )
+        response = self.guest_client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_depends_on_user(self):
+        """Анонимный и авторизованный пользователи получают разные ETag."""
+        authorized_client = Client()
+        authorized_client.force_login(self.user)
+        self.assertNotEqual(
+            self.guest_client.get(self.addresses[0])['ETag'],
+            authorized_client.get(self.addresses[0])['ETag'],
+        )
+
+    def test_changes_keep_other_pages_cached(self):
+        """Комментарий и подписка не трогают страницы других областей."""
+        other = User.objects.create_user(username='other')
+        other_group = Group.objects.create(title='Другая', slug='other')
+        other_post = Post.objects.create(
+            author=other, group=other_group, text='Другой пост'
+        )
+        untouched = [
+            reverse('posts:group_list', kwargs={'slug': 'other'}),
+            reverse('posts:profile', kwargs={'username': 'other'}),
+            reverse('posts:post_detail', kwargs={'post_id': other_post.pk}),
+            reverse('posts:group_rss', kwargs={'slug': 'other'}),
+        ]
+        changes = {
+            'comment': lambda: Comment.objects.create(
+                post=self.post, author=other, text='Комментарий'
+            ),
+            'follow': lambda: Follow.objects.create(
+                user=self.user,
+                author=User.objects.create_user(username='followed'),
+            ),
+        }
+        for name, change in changes.items():
+            with self.subTest(change=name):
+                etags = {
+                    address: self.guest_client.get(address)['ETag']
+                    for address in untouched
+                }
+                change()
+                for address, etag in etags.items():
+                    response = self.guest_client.get(
+                        address, HTTP_IF_NONE_MATCH=etag
+                    )
+                    self.assertEqual(
+                        response.status_code, HTTPStatus.NOT_MODIFIED
+                    )
+                    self.assertEqual(response['X-Page-Cache'], 'HIT')
+
+    def test_follow_changes_both_profiles_only(self):
+        """Подписка меняет профили подписчика и автора, но не главную."""
+        author = User.objects.create_user(username='author')
+        profiles = {
+            reverse('posts:profile', kwargs={'username': 'auth'}):
+                'following_count',
+            reverse('posts:profile', kwargs={'username': 'author'}):
+                'followers_count',
+        }
+        for address in (*profiles, self.addresses[0]):
+            self.guest_client.get(address)
+        Follow.objects.create(user=self.user, author=author)
+        for address, counter in profiles.items():
+            with self.subTest(address=address):
+                response = self.guest_client.get(address)
+                self.assertEqual(response['X-Page-Cache'], 'MISS')
+                self.assertEqual(
+                    getattr(response.context['author'].stats, counter), 1
+                )
+        self.assertEqual(
+            self.guest_client.get(self.addresses[0])['X-Page-Cache'], 'HIT'
+        )
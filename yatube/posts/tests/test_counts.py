@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from ..counts import (AUTHOR, FOLLOWER, GLOBAL, GROUP, CachedCountPaginator,
+                      count_key, reconcile)
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class PostCountsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.follower = User.objects.create_user(username='follower')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.follower, author=cls.author)
+        Post.objects.create(author=cls.author, text='Пост', group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        reconcile()
+
+    def cached_counts(self):
+        return cache.get_many([
+            count_key(GLOBAL),
+            count_key(GROUP, self.group.pk),
+            count_key(AUTHOR, self.author.pk),
+        ])
+
+    def test_counts_follow_created_and_deleted_posts(self):
+        """Счётчики всех областей меняются при создании и удалении поста."""
+        post = Post.objects.create(
+            author=self.author, text='Новый пост', group=self.group
+        )
+        self.assertEqual(set(self.cached_counts().values()), {2})
+        self.assertIsNone(cache.get(count_key(FOLLOWER, self.follower.pk)))
+        post.delete()
+        self.assertEqual(set(self.cached_counts().values()), {1})
+
+    def test_group_change_moves_count(self):
+        """Смена группы у поста переносит его между счётчиками групп."""
+        post = Post.objects.get()
+        post.group = None
+        post.save()
+        self.assertEqual(cache.get(count_key(GROUP, self.group.pk)), 0)
+
+    def test_paginator_reads_count_from_cache(self):
+        """Паджинатор не выполняет COUNT(*), если счётчик уже в кеше."""
+        paginator = CachedCountPaginator(Post.objects.all(), 10, GLOBAL)
+        with self.assertNumQueries(0):
+            self.assertEqual(paginator.count, 1)
+
+    def test_reconcile_fixes_drift(self):
+        """Сверка перезаписывает разошедшиеся счётчики."""
+        cache.set(count_key(GLOBAL), 100)
+        cache.delete(count_key(FOLLOWER, self.follower.pk))
+        reconcile()
+        self.assertEqual(set(self.cached_counts().values()), {1})
+        self.assertEqual(cache.get(count_key(FOLLOWER, self.follower.pk)), 1)
@@ -0,0 +1,134 @@
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост автора',
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        )
+        cls.other_post = Post.objects.create(
+            author=cls.reader, group=cls.group, text='Пост читателя'
+        )
+        Comment.objects.create(
+            post=cls.other_post, author=cls.author, text='Комментарий автора'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def client_for(self, user):
+        client = Client()
+        client.force_login(user)
+        return client
+
+    def export(self, client, address, **params):
+        response = client.get(address, params)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_author_exports_own_posts_and_comments(self):
+        """Автор получает свои посты, комментарии и их посты в JSON Lines."""
+        response, content = self.export(
+            self.client_for(self.author),
+            reverse('posts:profile_export', args=['author']),
+        )
+        self.assertEqual(
+            response['Content-Type'], 'application/x-ndjson; charset=utf-8'
+        )
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual(
+            [(row['type'], row['text']) for row in rows],
+            [
+                ('post', 'Пост автора'),
+                ('post', 'Пост читателя'),
+                ('comment', 'Комментарий автора'),
+            ],
+        )
+        self.assertEqual(rows[0]['group'], 'group')
+        self.assertEqual(rows[2]['post'], self.other_post.pk)
+
+    def test_export_access(self):
+        """Чужие данные выгружает только персонал, гостя просят войти."""
+        cases = {
+            ('reader', 'posts:profile_export', 'author'): 403,
+            ('staff', 'posts:profile_export', 'author'): 200,
+            ('reader', 'posts:group_export', 'group'): 403,
+            ('staff', 'posts:group_export', 'group'): 200,
+        }
+        for (username, name, arg), status in cases.items():
+            with self.subTest(user=username, view=name):
+                client = self.client_for(User.objects.get(username=username))
+                response = client.get(reverse(name, args=[arg]))
+                self.assertEqual(response.status_code, status)
+        response = Client().get(reverse('posts:group_export', args=['group']))
+        self.assertEqual(response.status_code, 302)
+
+    def test_group_zip_contains_content_and_media(self):
+        """С ?media=1 группа выгружается zip-архивом с картинками."""
+        response, content = self.export(
+            self.client_for(self.staff),
+            reverse('posts:group_export', args=['group']), media=1,
+        )
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        archive = zipfile.ZipFile(BytesIO(content))
+        self.assertIsNone(archive.testzip())
+        self.assertIn(f'media/{self.post.image.name}', archive.namelist())
+        self.assertEqual(
+            archive.read(f'media/{self.post.image.name}'), SMALL_GIF
+        )
+        lines = archive.read('content.jsonl').decode().splitlines()
+        self.assertEqual(len(lines), 3)
+
+    def test_command_output_can_be_imported(self):
+        """Выгрузка команды export_posts читается командой import_posts."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'author.jsonl')
+            call_command('export_posts', '--author=author', f'--output={path}')
+            Post.objects.all().delete()
+            err = StringIO()
+            call_command('import_posts', path, stdout=StringIO(), stderr=err)
+        self.assertEqual(err.getvalue(), '')
+        post = Post.objects.get(author=self.author, text='Пост автора')
+        self.assertEqual(post.image.name, self.post.image.name)
+        self.assertEqual(
+            Comment.objects.get(author=self.author).post.text,
+            'Пост читателя',
+        )
@@ -0,0 +1,148 @@
+from datetime import timedelta
+from http import HTTPStatus
+from unittest import mock
+from xml.etree import ElementTree
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', first_name='Анна', last_name='Петрова'
+        )
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Коты', slug='cats', description='Всё о котах'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост <b>про котов</b>'
+        )
+        cls.other_post = Post.objects.create(
+            author=cls.other, text='Пост без группы'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.feeds = {
+            reverse('posts:index_rss'): 2,
+            reverse('posts:group_rss', args=['cats']): 1,
+            reverse('posts:profile_rss', args=['author']): 1,
+        }
+
+    def test_rss_feeds_list_posts_of_their_stream(self):
+        """RSS общей ленты, группы и автора содержит только их посты."""
+        for address, count in self.feeds.items():
+            with self.subTest(address=address):
+                response = self.client.get(address)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertTrue(
+                    response['Content-Type'].startswith('application/rss+xml')
+                )
+                items = ElementTree.fromstring(response.content).findall(
+                    'channel/item'
+                )
+                self.assertEqual(len(items), count)
+        item = ElementTree.fromstring(
+            self.client.get(reverse('posts:group_rss', args=['cats'])).content
+        ).find('channel/item')
+        self.assertEqual(
+            item.findtext('link'),
+            'http://testserver'
+            + reverse('posts:post_detail', args=[self.post.pk]),
+        )
+        self.assertIn('&lt;b&gt;', item.findtext('description'))
+        self.assertEqual(item.findtext('category'), 'Коты')
+
+    def test_atom_feed(self):
+        """Atom автора с именем автора и датой изменения поста."""
+        response = self.client.get(
+            reverse('posts:profile_atom', args=['author'])
+        )
+        self.assertTrue(
+            response['Content-Type'].startswith('application/atom+xml')
+        )
+        feed = ElementTree.fromstring(response.content)
+        entry = feed.find(f'{ATOM}entry')
+        self.assertEqual(
+            entry.findtext(f'{ATOM}author/{ATOM}name'), 'Анна Петрова'
+        )
+        self.assertIsNotNone(entry.findtext(f'{ATOM}updated'))
+
+    def test_unknown_stream_returns_not_found(self):
+        """Лента несуществующей группы или автора отдаёт 404."""
+        for address in (
+            reverse('posts:group_rss', args=['missing']),
+            reverse('posts:profile_atom', args=['missing']),
+        ):
+            with self.subTest(address=address):
+                response = self.client.get(address)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_matching_etag_returns_not_modified(self):
+        """Повторный опрос с ETag получает 304 из кеша без запросов к БД."""
+        for address in self.feeds:
+            with self.subTest(address=address):
+                response = self.client.get(address)
+                self.assertEqual(response['X-Page-Cache'], 'MISS')
+                self.assertTrue(response.has_header('ETag'))
+                self.assertTrue(response.has_header('Last-Modified'))
+                with self.assertNumQueries(0):
+                    cached = self.client.get(
+                        address, HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+                self.assertEqual(cached.status_code, HTTPStatus.NOT_MODIFIED)
+                self.assertEqual(cached['X-Page-Cache'], 'HIT')
+
+    def test_etag_is_checked_without_page_cache(self):
+        """Мимо кеша совпавший ETag проверяется одним запросом."""
+        address = reverse('posts:index_rss')
+        self.client.cookies['csrftoken'] = 'token'
+        etag = self.client.get(address)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_new_post_changes_feed(self):
+        """Новый пост сбрасывает кеш и меняет ETag ленты группы."""
+        address = reverse('posts:group_rss', args=['cats'])
+        etag = self.client.get(address)['ETag']
+        Post.objects.create(
+            author=self.other, group=self.group, text='Новый пост'
+        )
+        response = self.client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('Новый пост', response.content.decode())
+
+    def test_last_modified_follows_edits(self):
+        """Лента отдаёт дату своей проверки, а правка поста снимает 304."""
+        address = reverse('posts:profile_rss', args=['author'])
+        response = self.client.get(address)
+        self.assertEqual(
+            response['Last-Modified'],
+            http_date(response.wsgi_request._latest_change.timestamp()),
+        )
+        later = timezone.now() + timedelta(minutes=1)
+        with mock.patch('django.utils.timezone.now', lambda: later), \
+                mock.patch('core.cache.time.time', later.timestamp):
+            self.post.text = 'Исправленный пост'
+            self.post.save()
+            response = self.client.get(
+                address, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+            )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('Исправленный пост', response.content.decode())
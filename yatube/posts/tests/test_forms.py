@@ -76,7 +76,7 @@ class PostFormTests(TestCase):
             Post.objects.filter(
                 text='Новый текст',
                 group=self.group.id,
-                image='posts/small.gif'
+                image__regex=r'^posts/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$'
             ).exists()
         )
 
@@ -0,0 +1,72 @@
+from io import BytesIO
+
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from ..images import process_upload
+
+
+def upload(image, name, image_format, **options):
+    buffer = BytesIO()
+    image.save(buffer, image_format, **options)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+@override_settings(POST_IMAGE_MAX_SIDE=100, POST_IMAGE_MAX_PIXELS=1_000_000)
+class ProcessUploadTests(TestCase):
+    def open(self, result):
+        result.seek(0)
+        return Image.open(result)
+
+    def test_large_photo_is_downsized(self):
+        """Большая фотография уменьшается до предельной стороны."""
+        result = process_upload(upload(
+            Image.new('RGB', (800, 400), 'red'), 'photo.jpeg', 'JPEG'
+        ))
+        image = self.open(result)
+        self.assertEqual(image.size, (100, 50))
+        self.assertEqual(image.format, 'JPEG')
+        self.assertEqual(result.name, 'photo.jpg')
+
+    def test_orientation_applied_and_metadata_stripped(self):
+        """Поворот из EXIF применяется, метаданные не сохраняются."""
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        exif[0x010F] = 'Camera'
+        result = process_upload(upload(
+            Image.new('RGB', (80, 40), 'red'), 'photo.jpg', 'JPEG',
+            exif=exif.tobytes(),
+        ))
+        image = self.open(result)
+        self.assertEqual(image.size, (40, 80))
+        self.assertEqual(len(image.getexif()), 0)
+
+    def test_transparent_image_stays_png(self):
+        """Картинка с прозрачностью перекодируется в PNG."""
+        result = process_upload(upload(
+            Image.new('RGBA', (50, 50), (255, 0, 0, 0)), 'logo.gif', 'PNG'
+        ))
+        image = self.open(result)
+        self.assertEqual(image.format, 'PNG')
+        self.assertEqual(result.name, 'logo.png')
+
+    def test_too_many_pixels_rejected(self):
+        """Слишком большое по заголовку изображение отклоняется."""
+        with self.assertRaises(ValidationError):
+            process_upload(upload(
+                Image.new('1', (2000, 1000)), 'huge.png', 'PNG'
+            ))
+
+    def test_truncated_jpeg_rejected(self):
+        """Обрезанный JPEG отклоняется ошибкой формы, а не падением."""
+        buffer = BytesIO()
+        Image.effect_noise((300, 300), 64).convert('RGB').save(
+            buffer, 'JPEG'
+        )
+        data = buffer.getvalue()
+        with self.assertRaises(ValidationError):
+            process_upload(
+                SimpleUploadedFile('broken.jpg', data[:len(data) // 2])
+            )
@@ -0,0 +1,133 @@
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from .. import search
+from ..importer import Importer
+from ..models import Comment, Follow, Group, Post, TimelineEntry
+
+User = get_user_model()
+
+ROWS = [
+    {'id': 'a1', 'author': 'old_anna', 'group': 'cats',
+     'text': 'Старый пост про котов', 'pub_date': '2015-03-01T10:00:00Z'},
+    {'id': 'a2', 'author': 'old_boris', 'text': 'Ещё один старый пост'},
+    {'type': 'comment', 'post': 'a1', 'author': 'old_boris',
+     'text': 'Старый комментарий', 'created': '2015-03-02T10:00:00Z'},
+    {'type': 'follow', 'user': 'reader', 'author': 'old_anna'},
+]
+
+
+class ImportPostsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = Group.objects.create(
+            title='Коты', slug='cats', description='Описание'
+        )
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def run_import(self, name, content, **options):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as source:
+            source.write(content)
+        out, err = StringIO(), StringIO()
+        call_command(
+            'import_posts', path, stdout=out, stderr=err, **options
+        )
+        return out.getvalue(), err.getvalue()
+
+    def test_jsonl_import_keeps_dates_and_rebuilds_side_effects(self):
+        """JSONL импортируется с датами из файла и пересчётом лент."""
+        out, err = self.run_import(
+            'posts.jsonl', '\n'.join(json.dumps(row) for row in ROWS),
+            batch_size=2,
+        )
+        self.assertEqual(err, '')
+        self.assertIn('Постов: 2, комментариев: 1, подписок: 1', out)
+        self.assertIn('строк/с', out)
+        post = Post.objects.get(text='Старый пост про котов')
+        self.assertEqual(
+            post.pub_date, datetime(2015, 3, 1, 10, tzinfo=timezone.utc)
+        )
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(post.author.username, 'old_anna')
+        self.assertFalse(post.author.has_usable_password())
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(
+            Comment.objects.get(post=post).created,
+            datetime(2015, 3, 2, 10, tzinfo=timezone.utc),
+        )
+        self.assertEqual(post.author.stats.posts_count, 1)
+        self.assertEqual(post.author.stats.followers_count, 1)
+        self.assertTrue(
+            Follow.objects.filter(user=self.reader, author=post.author)
+            .exists()
+        )
+        self.assertEqual(
+            list(TimelineEntry.objects.filter(user=self.reader)
+                 .values_list('post', flat=True)),
+            [post.pk],
+        )
+        self.assertEqual(list(search.search('котов')), [post])
+
+    def test_csv_import(self):
+        """CSV импортируется с типом строк из --type."""
+        out, _ = self.run_import(
+            'posts.csv',
+            'author,text,group\nold_anna,Пост из CSV,cats\n'
+            'old_anna,Второй пост из CSV,\n',
+        )
+        self.assertIn('Постов: 2', out)
+        self.assertEqual(
+            Post.objects.filter(author__username='old_anna').count(), 2
+        )
+
+    def test_bad_rows_are_reported_and_skipped(self):
+        """Строки с ошибками пропускаются с номером в stderr."""
+        rows = [
+            json.dumps({'author': 'old_anna', 'text': 'Хороший пост'}),
+            'не json',
+            json.dumps({'author': 'old_anna', 'text': 'Пост',
+                        'group': 'missing'}),
+            json.dumps({'type': 'comment', 'post': 'x', 'author': 'a',
+                        'text': 'Комментарий'}),
+        ]
+        out, err = self.run_import('posts.jsonl', '\n'.join(rows))
+        self.assertIn('пропущено строк: 3', out)
+        self.assertIn('Строка 3: неизвестная группа: missing', err)
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_rejected_follow_creates_no_user(self):
+        """Отклонённая подписка не оставляет созданного пользователя."""
+        _, err = self.run_import('follows.jsonl', json.dumps(
+            {'type': 'follow', 'user': 'new_reader', 'author': 'x' * 200}
+        ))
+        self.assertIn('слишком длинное имя', err)
+        self.assertFalse(User.objects.filter(username='new_reader').exists())
+
+    def test_batch_with_taken_ids_is_skipped(self):
+        """Пачка, чьи id заняты записями с сайта, пропускается целиком."""
+        importer = Importer(batch_size=100)
+        importer.add({'author': 'old_anna', 'text': 'Потерянный пост'})
+        User.objects.create_user(username='site_user')
+        importer.flush()
+        importer.add({'author': 'old_anna', 'text': 'Записанный пост'})
+        importer.finish()
+        self.assertEqual(importer.rejected, 1)
+        self.assertEqual(len(importer.failed), 1)
+        self.assertEqual(importer.imported['post'], 1)
+        self.assertEqual(
+            list(Post.objects.values_list('text', 'author__username')),
+            [('Записанный пост', 'old_anna')],
+        )
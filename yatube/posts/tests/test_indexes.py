@@ -0,0 +1,105 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+from ..utils import KEYSET_ORDERING, NEXT, TIMELINE_ORDERING, KeysetPaginator
+
+User = get_user_model()
+
+TABLES = ('posts_post', 'posts_comment', 'posts_follow',
+          'posts_timelineentry')
+
+
+def query_plan(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = Group.objects.create(
+            title='Группа', slug='test-slug', description='Описание'
+        )
+        cls.author = User.objects.create_user(username='author')
+        cls.follower = User.objects.create_user(username='follower')
+        Follow.objects.create(user=cls.follower, author=cls.author)
+        for number in range(3):
+            cls.post = Post.objects.create(
+                author=cls.author, text=f'Пост {number}', group=cls.group
+            )
+            Comment.objects.create(
+                post=cls.post, author=cls.follower, text='Комментарий'
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.follower)
+
+    def cursor(self, queryset, ordering):
+        paginator = KeysetPaginator(queryset, 1, ordering)
+        return paginator.encode_cursor(paginator.object_list[0], NEXT)
+
+    def plans(self, address, data=None):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(address, data)
+        return {
+            query['sql']: query_plan(query['sql'])
+            for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and any(f'"{table}"' in query['sql'] for table in TABLES)
+        }
+
+    def test_views_use_indexes(self):
+        """Запросы страниц идут по индексам без сортировки во временных
+        B-деревьях и без полного просмотра таблиц ленты."""
+        profile_cursor = self.cursor(self.author.posts.all(), KEYSET_ORDERING)
+        follow_cursor = self.cursor(
+            Post.objects.for_timeline(self.follower), TIMELINE_ORDERING
+        )
+        pages = [
+            (reverse('posts:index'), None, 'posts_post_pub_date'),
+            (reverse('posts:group_list', args=['test-slug']), None,
+             'post_group_date_idx'),
+            (reverse('posts:profile', args=['author']), None,
+             'post_author_date_idx'),
+            (reverse('posts:profile', args=['author']),
+             {'cursor': profile_cursor}, 'post_author_date_idx'),
+            (reverse('posts:post_detail', args=[self.post.pk]), None,
+             'comment_post_created_idx'),
+            (reverse('posts:post_comments', args=[self.post.pk]), None,
+             'comment_post_created_idx'),
+            (reverse('posts:follow_index'), None, 'timeline_user_date_idx'),
+            (reverse('posts:follow_index'), {'cursor': follow_cursor},
+             'timeline_user_date_idx'),
+        ]
+        for address, data, index in pages:
+            with self.subTest(address=address, data=data):
+                plans = self.plans(address, data)
+                details = [
+                    detail for plan in plans.values() for detail in plan
+                ]
+                for sql, plan in plans.items():
+                    for detail in plan:
+                        self.assertNotIn('TEMP B-TREE', detail, sql)
+                        for table in TABLES:
+                            self.assertNotEqual(
+                                detail, f'SCAN {table}', sql
+                            )
+                self.assertTrue(
+                    any(index in detail for detail in details), plans
+                )
+
+    def test_followers_lookup_uses_index(self):
+        """Подписчики автора при раскладке поста берутся из индекса."""
+        queryset = Follow.objects.filter(
+            author=self.author
+        ).values_list('user_id', flat=True)
+        plan = query_plan(str(queryset.query))
+        self.assertIn('COVERING INDEX follow_author_user_idx', plan[0])
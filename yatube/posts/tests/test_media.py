@@ -0,0 +1,108 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TransactionTestCase, override_settings
+from PIL import Image
+
+from .. import thumbnails
+from ..models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(color='red'):
+    buffer = BytesIO()
+    Image.new('RGB', (100, 60), color).save(buffer, 'PNG')
+    return SimpleUploadedFile('pic.png', buffer.getvalue(), 'image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_THUMBNAIL_WORKERS=0)
+class SharedMediaTests(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+
+    def create(self, image):
+        return Post.objects.create(
+            author=self.author, text='Пост', image=image
+        )
+
+    def thumbnail_paths(self, post):
+        return [
+            thumbnail.storage.path(thumbnail.name)
+            for thumbnail in thumbnails.lookup(post.image).values()
+        ]
+
+    def test_same_picture_is_shared(self):
+        """Одинаковые картинки хранятся и обрабатываются один раз."""
+        first = self.create(make_image())
+        second = self.create(make_image())
+        self.assertEqual(first.image.name, second.image.name)
+        paths = self.thumbnail_paths(first)
+        self.assertEqual(paths, self.thumbnail_paths(second))
+        self.assertTrue(all(os.path.exists(path) for path in paths))
+
+    def test_file_removed_with_last_reference(self):
+        """Файл и миниатюры удаляются вместе с последним постом."""
+        first = self.create(make_image())
+        second = self.create(make_image())
+        original = first.image.path
+        paths = self.thumbnail_paths(first)
+        first.delete()
+        self.assertTrue(os.path.exists(original))
+        second.delete()
+        self.assertFalse(os.path.exists(original))
+        self.assertFalse(any(os.path.exists(path) for path in paths))
+
+    def test_file_picked_by_pending_upload_survives(self):
+        """Файл, выбранный ещё не записанной загрузкой, не удаляется."""
+        post = self.create(make_image())
+        storage = Post._meta.get_field('image').storage
+        name = storage.save('posts/pic.png', make_image())
+        self.assertEqual(name, post.image.name)
+        post.delete()
+        self.assertTrue(storage.exists(name))
+        storage.settle(name)
+        self.create(make_image()).delete()
+        self.assertFalse(storage.exists(name))
+
+    def test_file_claimed_while_retired_is_restored(self):
+        """Файл, занятый во время удаления, возвращается на место."""
+        post = self.create(make_image())
+        storage = Post._meta.get_field('image').storage
+        retire = storage.retire
+
+        def retire_during_upload(name):
+            retired = retire(name)
+            storage.save('posts/pic.png', make_image())
+            return retired
+
+        with mock.patch.object(storage, 'retire', retire_during_upload):
+            post.delete()
+        self.assertTrue(storage.exists(post.image.name))
+        self.assertEqual(
+            [name for name in os.listdir(os.path.dirname(post.image.path))
+             if name.endswith('.retired')],
+            [],
+        )
+
+    def test_replaced_image_released(self):
+        """Заменённая картинка удаляется, если больше не используется."""
+        post = self.create(make_image())
+        original = post.image.path
+        post.image = make_image('blue')
+        post.save()
+        self.assertFalse(os.path.exists(original))
+        self.assertTrue(os.path.exists(post.image.path))
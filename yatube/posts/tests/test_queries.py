@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class FeedQueriesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.author = User.objects.create_user(
+            username='author', first_name='Имя', last_name='Фамилия'
+        )
+        cls.other_author = User.objects.create_user(username='other')
+        cls.follower = User.objects.create_user(username='follower')
+        Follow.objects.create(user=cls.follower, author=cls.author)
+        Follow.objects.create(user=cls.follower, author=cls.other_author)
+        for number in range(10):
+            post = Post.objects.create(
+                author=cls.author if number % 2 else cls.other_author,
+                text=f'Тестовый пост {number}',
+                group=cls.group if number % 3 else None,
+            )
+            for comment_number in range(number % 3):
+                Comment.objects.create(
+                    post=post,
+                    author=cls.follower,
+                    text=f'Комментарий {comment_number}',
+                )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.follower_client = Client()
+        self.follower_client.force_login(self.follower)
+
+    def test_feed_pages_query_count(self):
+        """Число запросов ленты не зависит от количества постов."""
+        # Первый запрос ещё ищет id группы, автора или поста для ключа кеша.
+        pages = {
+            reverse('posts:index'): 2,
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}): 4,
+            reverse('posts:profile', kwargs={'username': 'author'}): 4,
+            reverse('posts:post_detail', kwargs={
+                'post_id': Post.objects.latest('pk').pk
+            }): 4,
+        }
+        for address, queries in pages.items():
+            with self.subTest(address=address):
+                with self.assertNumQueries(queries):
+                    self.guest_client.get(address)
+
+    def test_follow_index_query_count(self):
+        """Лента подписок загружает посты одним запросом."""
+        with self.assertNumQueries(3):
+            self.follower_client.get(reverse('posts:follow_index'))
@@ -0,0 +1,102 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import search
+from ..models import Post
+
+User = get_user_model()
+
+
+class PostSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.cats = Post.objects.create(
+            author=cls.author, text='Кошки и котята: кошки повсюду'
+        )
+        cls.dogs = Post.objects.create(
+            author=cls.author, text='Собаки и кошки'
+        )
+        cls.birds = Post.objects.create(author=cls.author, text='Птицы')
+
+    def found(self, text):
+        return list(search.search(text))
+
+    def test_search_ranks_matches(self):
+        """Поиск находит посты по словам и сортирует по релевантности."""
+        self.assertEqual(self.found('КОШКИ'), [self.cats, self.dogs])
+        self.assertEqual(self.found('собаки кошки'), [self.dogs])
+        self.assertEqual(self.found(''), [])
+
+    def test_fts_syntax_is_not_interpreted(self):
+        """Операторы и кавычки FTS5 во вводе не ломают запрос."""
+        for text in ('"кошки', 'кошки OR птицы', 'NEAR(', '*'):
+            with self.subTest(text=text):
+                self.found(text)
+
+    def test_index_follows_changes(self):
+        """Индекс обновляется при изменении, удалении и bulk_create."""
+        Post.objects.filter(pk=self.birds.pk).update(text='Птицы и кошки')
+        self.assertIn(self.birds, self.found('кошки'))
+        Post.objects.filter(pk=self.dogs.pk).delete()
+        self.assertNotIn(self.dogs, self.found('кошки'))
+        Post.objects.bulk_create([Post(author=self.author, text='Еноты')])
+        self.assertEqual(len(self.found('еноты')), 1)
+
+    def test_triggers_restored(self):
+        """ensure_triggers возвращает триггеры после пересоздания таблицы."""
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TRIGGER {search.TABLE}_insert')
+        search.ensure_triggers(connection)
+        Post.objects.create(author=self.author, text='Еноты')
+        self.assertEqual(len(self.found('еноты')), 1)
+
+    def test_search_view_paginates_by_cursor(self):
+        """Страница поиска листается курсором с сохранением запроса."""
+        for number in range(12):
+            Post.objects.create(author=self.author, text=f'Еноты {number}')
+        address = reverse('posts:post_search')
+        response = self.client.get(address, {'q': 'еноты'})
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), 10)
+        self.assertContains(
+            response, '?q=%D0%B5%D0%BD%D0%BE%D1%82%D1%8B&cursor='
+        )
+        second = self.client.get(
+            address, {'q': 'еноты', 'cursor': page_obj.next_cursor}
+        ).context['page_obj']
+        self.assertEqual(len(second), 2)
+        self.assertFalse(set(page_obj) & set(second))
+        previous = self.client.get(
+            address, {'q': 'еноты', 'cursor': second.previous_cursor}
+        ).context['page_obj']
+        self.assertEqual(list(previous), list(page_obj))
+
+    def test_search_view_without_words(self):
+        """Пустой запрос и запрос из одних знаков не ломают страницу."""
+        address = reverse('posts:post_search')
+        for params in ({}, {'q': ''}, {'q': '!!'}, {'q': '!!', 'cursor': 'x'}):
+            with self.subTest(params=params):
+                response = self.client.get(address, params)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.context['page_obj']), 0)
+        self.assertContains(response, 'Ничего не найдено.')
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке идёт по полнотекстовому индексу."""
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'кошки'}
+        )
+        self.assertEqual(
+            set(response.context['cl'].result_list), {self.cats, self.dogs}
+        )
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': '!!'}
+        )
+        self.assertEqual(list(response.context['cl'].result_list), [])
@@ -0,0 +1,62 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import Follow, Post, UserStats
+
+User = get_user_model()
+
+
+class UserStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.follower = User.objects.create_user(username='follower')
+
+    def assert_stats(self, user, posts, followers, following):
+        stats = UserStats.objects.get(user=user)
+        self.assertEqual(
+            (stats.posts_count, stats.followers_count, stats.following_count),
+            (posts, followers, following),
+        )
+
+    def test_stats_row_created_with_user(self):
+        """Строка статистики появляется вместе с пользователем."""
+        self.assert_stats(self.author, 0, 0, 0)
+
+    def test_stats_follow_posts(self):
+        """Счётчик постов меняется при создании и удалении поста."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        self.assert_stats(self.author, 1, 0, 0)
+        post.delete()
+        self.assert_stats(self.author, 0, 0, 0)
+
+    def test_stats_follow_subscriptions(self):
+        """Счётчики подписок меняются у обеих сторон подписки."""
+        follow = Follow.objects.create(user=self.follower, author=self.author)
+        self.assert_stats(self.author, 0, 1, 0)
+        self.assert_stats(self.follower, 0, 0, 1)
+        follow.delete()
+        self.assert_stats(self.author, 0, 0, 0)
+        self.assert_stats(self.follower, 0, 0, 0)
+
+    def test_user_with_posts_can_be_deleted(self):
+        """Каскадное удаление автора не пытается воссоздать статистику."""
+        user = User.objects.create_user(username='temporary')
+        Post.objects.create(author=user, text='Пост')
+        Follow.objects.create(user=self.follower, author=user)
+        user.delete()
+        self.assertFalse(UserStats.objects.filter(user_id=user.pk).exists())
+        self.assert_stats(self.follower, 0, 0, 0)
+
+    def test_rebuild_command_fixes_drift(self):
+        """Команда rebuild_user_stats восстанавливает счётчики."""
+        Post.objects.create(author=self.author, text='Пост')
+        UserStats.objects.filter(user=self.author).update(posts_count=42)
+        UserStats.objects.filter(user=self.follower).delete()
+        call_command('rebuild_user_stats', stdout=StringIO())
+        self.assert_stats(self.author, 1, 0, 0)
+        self.assert_stats(self.follower, 0, 0, 0)
@@ -0,0 +1,143 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from .. import thumbnails
+from ..models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(name='pic.png', color='red'):
+    buffer = BytesIO()
+    Image.new('RGB', (100, 60), color).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+def names(found):
+    return {variant: thumbnail.name for variant, thumbnail in found.items()}
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailLookupTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(
+            author=self.author, text='Пост с картинкой', image=make_image()
+        )
+
+    def test_page_does_not_render_thumbnail(self):
+        """Без готовой миниатюры страница ссылается на оригинал."""
+        missing = dict.fromkeys(thumbnails.variants())
+        self.assertEqual(thumbnails.lookup(self.post.image), missing)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, self.post.image.url)
+        self.assertNotContains(response, '<picture>')
+        self.assertEqual(thumbnails.lookup(self.post.image), missing)
+
+    def test_generated_thumbnail_is_used(self):
+        """После построения страница отдаёт srcset из всех вариантов."""
+        built = thumbnails.generate(self.post.pk)
+        self.assertEqual(len(built), len(thumbnails.variants()))
+        found = thumbnails.lookup(self.post.image)
+        self.assertEqual(
+            [thumbnail.name for thumbnail in found.values()],
+            [thumbnail.name for thumbnail in built],
+        )
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, '<picture>')
+        for variant, thumbnail in found.items():
+            self.assertEqual(thumbnail.width, variant.width)
+            self.assertContains(
+                response, f'{thumbnail.url} {variant.width}w'
+            )
+
+    @override_settings(
+        POST_THUMBNAIL_WIDTHS=(100, 200), POST_THUMBNAIL_FORMATS=('JPEG',)
+    )
+    def test_variants_follow_settings(self):
+        """Варианты строятся для заданных ширин с пропорцией 960x339."""
+        self.assertEqual(
+            [(variant.width, variant.geometry)
+             for variant in thumbnails.variants()],
+            [(100, '100x35'), (200, '200x71')],
+        )
+
+    def test_lookup_many_matches_lookup(self):
+        """Пакетный поиск находит те же миниатюры, что и поштучный."""
+        other = Post.objects.create(
+            author=self.author,
+            text='Ещё пост',
+            image=make_image('b.png', 'blue'),
+        )
+        thumbnails.generate(self.post.pk)
+        cache.clear()
+        with self.assertNumQueries(1):
+            found = thumbnails.lookup_many([self.post.image, other.image])
+        self.assertEqual(
+            names(found[self.post.image.name]),
+            names(thumbnails.lookup(self.post.image)),
+        )
+        self.assertEqual(
+            found[other.image.name], dict.fromkeys(thumbnails.variants())
+        )
+        with self.assertNumQueries(0):
+            thumbnails.lookup_many([self.post.image, other.image])
+
+    def test_feed_resolves_thumbnails_in_one_query(self):
+        """Лента ищет миниатюры одним запросом независимо от числа постов."""
+        for number in range(5):
+            post = Post.objects.create(
+                author=self.author,
+                text=f'Пост {number}',
+                image=make_image(f'{number}.png', (number, 0, 0)),
+            )
+            thumbnails.generate(post.pk)
+        cache.clear()
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('posts:index'))
+        for post in Post.objects.exclude(pk=self.post.pk):
+            for thumbnail in thumbnails.lookup(post.image).values():
+                self.assertContains(response, thumbnail.url)
+
+    def test_command_builds_missing_thumbnails(self):
+        """Команда строит миниатюры, которых ещё нет."""
+        out = StringIO()
+        call_command('generate_thumbnails', stdout=out)
+        self.assertIn('1', out.getvalue())
+        self.assertNotIn(None, thumbnails.lookup(self.post.image).values())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_THUMBNAIL_WORKERS=0)
+class ThumbnailScheduleTests(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_upload_builds_thumbnail(self):
+        """Миниатюра строится при создании поста через форму."""
+        author = User.objects.create_user(username='author')
+        self.client.force_login(author)
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'Новый пост', 'image': make_image('new.png'),
+        })
+        post = Post.objects.get()
+        self.assertNotIn(None, thumbnails.lookup(post.image).values())
@@ -0,0 +1,89 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from ..models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+@override_settings(TIMELINE_SIZE=3)
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.other_author = User.objects.create_user(username='other')
+        cls.follower = User.objects.create_user(username='follower')
+
+    def timeline(self):
+        return list(Post.objects.filter(
+            timeline_entries__user=self.follower
+        ).order_by('-pub_date', '-pk'))
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        """Новый пост попадает в ленты подписчиков автора."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        post = Post.objects.create(author=self.author, text='Пост')
+        Post.objects.create(author=self.other_author, text='Чужой пост')
+        self.assertEqual(self.timeline(), [post])
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        """Подписка заполняет ленту, отписка очищает её от постов автора."""
+        posts = [
+            Post.objects.create(author=self.author, text=f'Пост {number}')
+            for number in range(2)
+        ]
+        follow = Follow.objects.create(user=self.follower, author=self.author)
+        self.assertEqual(self.timeline(), posts[::-1])
+        follow.delete()
+        self.assertEqual(self.timeline(), [])
+
+    def test_timeline_is_capped(self):
+        """Лента подписчика хранит не больше TIMELINE_SIZE записей."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        posts = [
+            Post.objects.create(author=self.author, text=f'Пост {number}')
+            for number in range(5)
+        ]
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.follower).count(), 3
+        )
+        self.assertEqual(self.timeline(), posts[:1:-1])
+
+    def test_unfollow_restores_trimmed_posts(self):
+        """После отписки в ленту возвращаются вытесненные посты."""
+        Follow.objects.create(user=self.follower, author=self.other_author)
+        kept = [
+            Post.objects.create(author=self.other_author, text=f'Пост {n}')
+            for n in range(3)
+        ]
+        follow = Follow.objects.create(user=self.follower, author=self.author)
+        for number in range(3):
+            Post.objects.create(author=self.author, text=f'Новый {number}')
+        follow.delete()
+        self.assertEqual(self.timeline(), kept[::-1])
+        self.assertEqual(
+            list(Post.objects.for_timeline(self.follower)), kept[::-1]
+        )
+
+    def test_fan_out_trims_all_followers_at_once(self):
+        """Лишние записи всех подписчиков удаляются одним запросом."""
+        followers = [
+            User.objects.create_user(username=f'reader{number}')
+            for number in range(3)
+        ]
+        for follower in followers:
+            Follow.objects.create(user=follower, author=self.author)
+        for number in range(3):
+            Post.objects.create(author=self.author, text=f'Пост {number}')
+        with CaptureQueriesContext(connection) as context:
+            Post.objects.create(author=self.author, text='Новый пост')
+        self.assertEqual(
+            sum('ROW_NUMBER' in query['sql'] for query in context), 1
+        )
+        for follower in followers:
+            self.assertEqual(
+                TimelineEntry.objects.filter(user=follower).count(), 3
+            )
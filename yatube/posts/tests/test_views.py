@@ -1,3 +1,5 @@
+import base64
+import json
 import shutil
 import tempfile
 
@@ -10,6 +12,7 @@ from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 
 from ..models import Group, Post, Comment, Follow
+from ..utils import COMMENTS_ORDERING, NEXT, KeysetPaginator
 
 User = get_user_model()
 
@@ -206,7 +209,7 @@ class PostPagesTests(TestCase):
         )
         response = self.authorized_client.get(reverse('posts:index'))
         initial_content = response.content
-        new_post.delete()
+        Post.objects.filter(pk=new_post.pk).update(text='Изменённый пост')
         response = self.authorized_client.get(reverse('posts:index'))
         new_content = response.content
         self.assertEqual(initial_content, new_content)
@@ -215,6 +218,46 @@ class PostPagesTests(TestCase):
         after_cache_clear_content = response.content
         self.assertNotEqual(initial_content, after_cache_clear_content)
 
+    def test_cache_invalidated_by_post_changes(self):
+        """Создание, правка и удаление поста сбрасывают кеш лент."""
+        addresses = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={
+                'username': PostPagesTests.user.username
+            }),
+        ]
+        for address in addresses:
+            self.guest_client.get(address)
+        new_post = Post.objects.create(
+            author=PostPagesTests.user,
+            text='Новый пост',
+            group=self.group,
+        )
+        for address in addresses:
+            with self.subTest(address=address):
+                response = self.guest_client.get(address)
+                self.assertContains(response, 'Новый пост')
+        new_post.text = 'Исправленный пост'
+        new_post.save()
+        for address in addresses:
+            with self.subTest(address=address):
+                response = self.guest_client.get(address)
+                self.assertContains(response, 'Исправленный пост')
+        new_post.delete()
+        for address in addresses:
+            with self.subTest(address=address):
+                response = self.guest_client.get(address)
+                self.assertNotContains(response, 'Исправленный пост')
+
+    def test_cache_invalidated_by_group_changes(self):
+        """Переименование группы сбрасывает кеш главной страницы."""
+        self.guest_client.get(reverse('posts:index'))
+        self.group.title = 'Новое название группы'
+        self.group.save()
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Новое название группы')
+
 
 class PaginatorViewsTest(TestCase):
     @classmethod
@@ -235,6 +278,7 @@ class PaginatorViewsTest(TestCase):
 
     def setUp(self):
         self.guest_client = Client()
+        cache.clear()
 
     def test_first_page_contains_expected_number_of_records(self):
         """Паджинатор на первой странице работает правильно."""
@@ -363,3 +407,158 @@ class FollowTests(TestCase):
         )
         response = self.authorized_client.get(reverse('posts:follow_index'))
         self.assertNotIn(self.post, response.context['page_obj'])
+
+
+class KeysetPaginatorViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        for post_number in range(settings.TEST_PAGINATOR_NUMBER):
+            Post.objects.create(
+                author=cls.user,
+                text=f'Тестовый пост {post_number}',
+            )
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def test_cursor_pages_cover_all_posts(self):
+        """Переходы по курсору проходят всю ленту без пропусков."""
+        response = self.guest_client.get(reverse('posts:index'))
+        first_page = response.context['page_obj']
+        self.assertEqual(len(first_page), settings.POSTS_PER_PAGE)
+        self.assertFalse(first_page.previous_cursor)
+        response = self.guest_client.get(
+            reverse('posts:index'), {'cursor': first_page.next_cursor}
+        )
+        second_page = response.context['page_obj']
+        self.assertEqual(len(second_page), settings.TEST_SECOND_PAGE)
+        self.assertFalse(second_page.next_cursor)
+        self.assertEqual(
+            list(first_page) + list(second_page),
+            list(Post.objects.order_by('-pub_date', '-pk')),
+        )
+        response = self.guest_client.get(
+            reverse('posts:index'), {'cursor': second_page.previous_cursor}
+        )
+        self.assertEqual(
+            list(response.context['page_obj']), list(first_page)
+        )
+
+    def test_follow_cursor_pages_cover_timeline(self):
+        """Курсор ленты подписок проходит все посты автора."""
+        follower = User.objects.create_user(username='follower')
+        Follow.objects.create(user=follower, author=self.user)
+        client = Client()
+        client.force_login(follower)
+        first_page = client.get(
+            reverse('posts:follow_index')
+        ).context['page_obj']
+        second_page = client.get(
+            reverse('posts:follow_index'), {'cursor': first_page.next_cursor}
+        ).context['page_obj']
+        self.assertFalse(second_page.next_cursor)
+        self.assertEqual(
+            list(first_page) + list(second_page),
+            list(Post.objects.order_by('-pub_date', '-pk')),
+        )
+
+    def test_broken_cursor_returns_first_page(self):
+        """Испорченный курсор открывает первую страницу."""
+        cursors = {
+            'not_base64': 'не-курсор',
+            'bad_pk': 'WyJuIixbIjIwMjAtMDEtMDFUMDA6MDA6MDAiLCJhYmMiXV0=',
+            'bad_date': base64.urlsafe_b64encode(
+                json.dumps(['n', ['вчера', 1]]).encode()
+            ).decode(),
+            'nested': base64.urlsafe_b64encode(
+                json.dumps(['n', [[1], {'a': 1}]]).encode()
+            ).decode(),
+        }
+        for name, cursor in cursors.items():
+            with self.subTest(cursor=name):
+                response = self.guest_client.get(
+                    reverse('posts:index'), {'cursor': cursor}
+                )
+                self.assertEqual(
+                    len(response.context['page_obj']),
+                    settings.POSTS_PER_PAGE,
+                )
+                self.assertEqual(response.context['page_obj'].number, 1)
+
+    def test_cursor_pages_do_not_count_posts(self):
+        """Страница по курсору не выполняет COUNT(*)."""
+        with self.assertNumQueries(1):
+            paginator = KeysetPaginator(Post.objects.all(), 5)
+            list(paginator.get_page(None))
+
+
+@override_settings(COMMENTS_PER_PAGE=3)
+class CommentsPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+        cls.comments = [
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f'Комментарий {number}'
+            )
+            for number in range(5)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_post_detail_shows_first_comments(self):
+        """На странице поста выводится первая порция комментариев."""
+        response = self.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        self.assertEqual(
+            list(response.context['comments']), self.comments[:1:-1]
+        )
+        self.assertContains(response, 'Показать ещё комментарии')
+
+    def test_load_more_returns_next_comments(self):
+        """Фрагмент «показать ещё» отдаёт следующую порцию комментариев."""
+        response = self.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        cursor = response.context['comments'].next_cursor
+        with self.assertNumQueries(2):
+            response = self.guest_client.get(
+                reverse('posts:post_comments',
+                        kwargs={'post_id': self.post.pk}),
+                {'cursor': cursor},
+            )
+        self.assertTemplateUsed(response, 'posts/includes/comments.html')
+        self.assertEqual(
+            list(response.context['comments']), self.comments[1::-1]
+        )
+        self.assertNotContains(response, 'Показать ещё комментарии')
+
+    def test_exhausted_cursor_returns_no_comments(self):
+        """Курсор за последним комментарием не повторяет первую порцию."""
+        paginator = KeysetPaginator(
+            Comment.objects.all(), 3, ordering=COMMENTS_ORDERING
+        )
+        cursor = paginator.encode_cursor(self.comments[0], NEXT)
+        response = self.guest_client.get(
+            reverse('posts:post_comments', kwargs={'post_id': self.post.pk}),
+            {'cursor': cursor},
+        )
+        self.assertEqual(list(response.context['comments']), [])
+        self.assertIsNone(response.context['comments'].next_cursor)
+        self.assertNotContains(response, 'Показать ещё комментарии')
+
+    def test_comment_authors_are_loaded_with_comments(self):
+        """Авторы комментариев загружаются тем же запросом."""
+        with self.assertNumQueries(2):
+            self.guest_client.get(
+                reverse('posts:post_comments',
+                        kwargs={'post_id': self.post.pk})
+            )
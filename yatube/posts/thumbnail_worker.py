@@ -0,0 +1,39 @@
+"""Кодирование миниатюр в процессе пула.
+
+Модуль не импортирует модели на верхнем уровне: процесс, запущенный
+через spawn, загружает его до django.setup().
+"""
+import django
+
+
+def setup():
+    django.setup()
+
+
+def render(source_name, jobs):
+    """Строит миниатюры одной картинки, декодируя её один раз.
+
+    jobs — список (геометрия, опции sorl, имя файла). Функция не обращается
+    к базе. Возвращает [(имя, размер)] для записи в хранилище sorl.
+    """
+    from sorl.thumbnail import default
+    from sorl.thumbnail.images import ImageFile
+
+    from .media import image_file
+
+    source = image_file(source_name)
+    source_image = default.engine.get_image(source)
+    built = []
+    try:
+        for geometry, options, name in jobs:
+            thumbnail = ImageFile(name, default.storage)
+            if thumbnail.exists():
+                thumbnail.set_size()
+            else:
+                default.backend._create_thumbnail(
+                    source_image, geometry, options, thumbnail
+                )
+            built.append((thumbnail.name, thumbnail.size))
+    finally:
+        default.engine.cleanup(source_image)
+    return built
@@ -0,0 +1,236 @@
+import logging
+import multiprocessing
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.utils import timezone
+from PIL import Image
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+from sorl.thumbnail.models import KVStore
+
+from core.cache import bump_generation
+
+from . import media, thumbnail_worker
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+Variant = namedtuple('Variant', 'width format geometry')
+
+_lock = threading.Lock()
+_local = threading.local()
+_executor = None
+_executor_pid = None
+
+
+def variants():
+    """Размеры и форматы миниатюр поста, которые умеет кодировать Pillow.
+
+    Ширины берутся из POST_THUMBNAIL_WIDTHS, высота — по пропорции
+    POST_THUMBNAIL_GEOMETRY; форматы идут в порядке предпочтения.
+    """
+    Image.init()
+    base_width, base_height = map(
+        int, settings.POST_THUMBNAIL_GEOMETRY.split('x')
+    )
+    return [
+        Variant(
+            width,
+            image_format,
+            f'{width}x{round(width * base_height / base_width)}',
+        )
+        for image_format in settings.POST_THUMBNAIL_FORMATS
+        if image_format in Image.SAVE
+        for width in settings.POST_THUMBNAIL_WIDTHS
+    ]
+
+
+def _options(source, variant):
+    """Повторяет нормализацию опций sorl, чтобы имя миниатюры совпало."""
+    backend = default.backend
+    options = dict(settings.POST_THUMBNAIL_OPTIONS, format=variant.format)
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    return options
+
+
+def thumbnail_file(image, variant):
+    source = ImageFile(image)
+    name = default.backend._get_thumbnail_filename(
+        source, variant.geometry, _options(source, variant)
+    )
+    return ImageFile(name, default.storage)
+
+
+def lookup(image):
+    """Возвращает {вариант: готовая миниатюра или None} для картинки.
+
+    Каждый вариант ищется в хранилище sorl отдельно, изображение
+    не открывается и не пересчитывается.
+    """
+    if not image:
+        return {}
+    return {
+        variant: default.kvstore.get(thumbnail_file(image, variant))
+        for variant in variants()
+    }
+
+
+def lookup_many(images):
+    """Находит готовые миниатюры для нескольких картинок разом.
+
+    Возвращает {имя картинки: {вариант: миниатюра или None}}. Значения
+    читаются из кеша sorl одним get_many, промахи добираются одним
+    запросом к его таблице и возвращаются в кеш.
+    """
+    images = [image for image in images if image]
+    kv_cache = getattr(default.kvstore, 'cache', None)
+    if kv_cache is None:
+        return {image.name: lookup(image) for image in images}
+    keys = {
+        add_prefix(thumbnail_file(image, variant).key): (image.name, variant)
+        for image in images
+        for variant in variants()
+    }
+    values = kv_cache.get_many(list(keys))
+    missing = [key for key in keys if key not in values]
+    if missing:
+        found = dict(KVStore.objects.filter(
+            key__in=missing
+        ).values_list('key', 'value'))
+        fetched = {key: found.get(key, EMPTY_VALUE) for key in missing}
+        kv_cache.set_many(fetched, sorl_settings.THUMBNAIL_CACHE_TIMEOUT)
+        values.update(fetched)
+    result = {image.name: {} for image in images}
+    for key, (name, variant) in keys.items():
+        result[name][variant] = (
+            None if values[key] == EMPTY_VALUE
+            else deserialize_image_file(values[key])
+        )
+    return result
+
+
+def _jobs(image):
+    source = ImageFile(image)
+    return [
+        (
+            variant.geometry,
+            _options(source, variant),
+            thumbnail_file(image, variant).name,
+        )
+        for variant in variants()
+    ]
+
+
+def _store(post_id, image_name, built):
+    """Записывает готовые миниатюры в хранилище sorl и сбрасывает кеш."""
+    source = media.image_file(image_name)
+    default.kvstore.get_or_set(source)
+    thumbnails = []
+    for name, size in built:
+        thumbnail = ImageFile(name, default.storage)
+        thumbnail.set_size(size)
+        default.kvstore.set(thumbnail, source)
+        thumbnails.append(thumbnail)
+    Post.objects.filter(pk=post_id).update(updated=timezone.now())
+    post = Post.objects.filter(pk=post_id).only('author', 'group').first()
+    if post is not None:
+        from .signals import post_scopes
+        bump_generation(*post_scopes(post, post.group_id))
+    return thumbnails
+
+
+def generate(post_id):
+    """Строит варианты миниатюры поста в текущем процессе.
+
+    Картинка, общая с другим постом, уже имеет миниатюры и не
+    декодируется повторно.
+    """
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is None or not post.image:
+        return []
+    found = lookup(post.image)
+    if None not in found.values():
+        return list(found.values())
+    built = thumbnail_worker.render(post.image.name, _jobs(post.image))
+    return _store(post_id, post.image.name, built)
+
+
+def _collect(post_id, image_name, future):
+    close_old_connections()
+    try:
+        _store(post_id, image_name, future.result())
+    except Exception:
+        logger.exception('Не удалось построить миниатюры поста %s', post_id)
+    finally:
+        connections.close_all()
+
+
+def _get_executor():
+    global _executor, _executor_pid
+    with _lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.POST_THUMBNAIL_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=thumbnail_worker.setup,
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def start_deferring():
+    _local.pending = []
+
+
+def run_deferred():
+    """Строит миниатюры, отложенные до конца ответа в этом потоке."""
+    pending, _local.pending = getattr(_local, 'pending', None), None
+    for post_id in pending or ():
+        _generate_logged(post_id)
+
+
+def _generate_logged(post_id):
+    try:
+        generate(post_id)
+    except Exception:
+        logger.exception('Не удалось построить миниатюры поста %s', post_id)
+
+
+def schedule(post):
+    """Ставит построение миниатюр в очередь после фиксации транзакции.
+
+    При POST_THUMBNAIL_WORKERS > 0 картинки кодируются в пуле процессов,
+    иначе — в том же потоке после отправки ответа, а вне запроса сразу.
+    """
+    post_id, image = post.pk, post.image
+
+    def submit():
+        pending = getattr(_local, 'pending', None)
+        if None not in lookup(image).values():
+            return
+        if settings.POST_THUMBNAIL_WORKERS:
+            future = _get_executor().submit(
+                thumbnail_worker.render, image.name, _jobs(image)
+            )
+            future.add_done_callback(partial(_collect, post_id, image.name))
+        elif pending is not None:
+            pending.append(post_id)
+        else:
+            _generate_logged(post_id)
+
+    transaction.on_commit(submit)
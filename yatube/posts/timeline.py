@@ -0,0 +1,92 @@
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import Follow, Post, TimelineEntry
+
+BATCH_SIZE = 500
+
+TRIM_SQL = (
+    'DELETE FROM {table} WHERE id IN ('
+    'SELECT id FROM ('
+    'SELECT id, ROW_NUMBER() OVER ('
+    'PARTITION BY user_id ORDER BY pub_date DESC, post_id DESC'
+    ') AS position FROM {table} WHERE user_id IN ({users})'
+    ') AS ranked WHERE position > %s)'
+)
+
+
+def trim(user_ids):
+    """Оставляет в лентах подписчиков не больше TIMELINE_SIZE записей.
+
+    Лишние записи всех лент пачки удаляются одним запросом с оконной
+    функцией, а не запросом на каждого подписчика.
+    """
+    user_ids = list(user_ids)
+    table = connection.ops.quote_name(TimelineEntry._meta.db_table)
+    with connection.cursor() as cursor:
+        for start in range(0, len(user_ids), BATCH_SIZE):
+            chunk = user_ids[start:start + BATCH_SIZE]
+            cursor.execute(
+                TRIM_SQL.format(
+                    table=table, users=', '.join(['%s'] * len(chunk))
+                ),
+                [*chunk, settings.TIMELINE_SIZE],
+            )
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    followers = list(Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True))
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+            for user_id in followers
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    trim(followers)
+    return followers
+
+
+def backfill(follow):
+    """Добавляет в ленту подписчика последние посты нового автора."""
+    posts = Post.objects.filter(author_id=follow.author_id).order_by(
+        '-pub_date', '-pk'
+    ).values_list('pk', 'pub_date')[:settings.TIMELINE_SIZE]
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=follow.user_id, post_id=pk, pub_date=date)
+            for pk, date in posts
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    trim([follow.user_id])
+
+
+def prune(follow):
+    """Убирает из ленты подписчика посты автора, от которого он отписался.
+
+    Лента собирается заново: посты оставшихся авторов, вытесненные
+    раньше обрезкой, возвращаются в неё.
+    """
+    rebuild(follow.user_id)
+
+
+def rebuild(user_id):
+    """Собирает ленту подписчика заново из постов его авторов."""
+    posts = Post.objects.filter(author__following__user_id=user_id).order_by(
+        '-pub_date', '-pk'
+    ).values_list('pk', 'pub_date')[:settings.TIMELINE_SIZE]
+    with transaction.atomic():
+        TimelineEntry.objects.filter(user_id=user_id).delete()
+        TimelineEntry.objects.bulk_create(
+            (
+                TimelineEntry(user_id=user_id, post_id=pk, pub_date=date)
+                for pk, date in posts
+            ),
+            batch_size=BATCH_SIZE,
+        )
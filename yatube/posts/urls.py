@@ -1,14 +1,40 @@
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('feed/', feeds.index_rss, name='index_rss'),
+    path('feed/atom/', feeds.index_atom, name='index_atom'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path('group/<slug:slug>/feed/', feeds.group_rss, name='group_rss'),
+    path('group/<slug:slug>/feed/atom/', feeds.group_atom, name='group_atom'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path(
+        'profile/<str:username>/feed/', feeds.profile_rss, name='profile_rss'
+    ),
+    path(
+        'profile/<str:username>/feed/atom/',
+        feeds.profile_atom,
+        name='profile_atom'
+    ),
+    path(
+        'group/<slug:slug>/export/', views.group_export, name='group_export'
+    ),
+    path(
+        'profile/<str:username>/export/',
+        views.profile_export,
+        name='profile_export'
+    ),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
+    path('search/', views.post_search, name='post_search'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<post_id>/edit/', views.post_edit, name='post_edit'),
     path(
@@ -1,7 +1,196 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
+import json
+from datetime import datetime
 
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils import timezone
 
-def paginate(request, queryset, posts_per_page):
-    paginator = Paginator(queryset, posts_per_page)
+from .counts import CachedCountPaginator
+
+KEYSET_ORDERING = ('-pub_date', '-pk')
+COMMENTS_ORDERING = ('-created', '-pk')
+TIMELINE_ORDERING = ('-entry_date', '-entry_post')
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class KeysetPaginator(Paginator):
+    """Паджинатор по ключу сортировки без COUNT(*) и OFFSET.
+
+    Курсор кодирует направление и значения полей ordering у крайнего
+    поста страницы, поэтому стоимость запроса не зависит от глубины.
+    Страницы остаются обычными Page, соседей указывают атрибуты
+    next_cursor и previous_cursor.
+    """
+    is_keyset = True
+
+    def __init__(self, object_list, per_page, ordering=KEYSET_ORDERING):
+        self.ordering = tuple(ordering)
+        super().__init__(object_list.order_by(*self.ordering), per_page)
+
+    def _fields(self):
+        return [
+            (name.lstrip('-'), name.startswith('-'))
+            for name in self.ordering
+        ]
+
+    def encode_cursor(self, obj, direction):
+        values = [
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in (getattr(obj, name) for name, _ in self._fields())
+        ]
+        raw = json.dumps([direction, values])
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Возвращает (направление, значения) или None для битого курсора."""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            direction, values = json.loads(raw.decode())
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+            return None
+        if direction not in (NEXT, PREVIOUS):
+            return None
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            return None
+        try:
+            parsed = [
+                self._parse_value(name, value)
+                for (name, _), value in zip(self._fields(), values)
+            ]
+        except (ValidationError, ValueError, TypeError):
+            return None
+        return direction, parsed
+
+    def _parse_value(self, name, value):
+        """Значение курсора, приведённое к типу поля сортировки."""
+        if value is None or isinstance(value, (list, dict)):
+            raise ValueError(name)
+        field = self._field(name)
+        if field is not None:
+            value = field.to_python(value)
+        if value is None:
+            raise ValueError(name)
+        if isinstance(value, datetime) and timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        return value
+
+    def _field(self, name):
+        """Поле модели или аннотации; None для прочих колонок (extra)."""
+        opts = self.object_list.model._meta
+        if name == 'pk':
+            return opts.pk
+        try:
+            return opts.get_field(name)
+        except FieldDoesNotExist:
+            annotation = self.object_list.query.annotations.get(name)
+            return getattr(annotation, 'output_field', None)
+
+    def _after(self, queryset, values, forward):
+        """Отбирает строки после (forward) или до значений курсора."""
+        return queryset.filter(self._seek(values, forward))
+
+    def _seek(self, values, forward):
+        condition = Q()
+        equal = {}
+        for (name, descending), value in zip(self._fields(), values):
+            lookup = 'lt' if descending == forward else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        (name, descending), value = self._fields()[0], values[0]
+        bound = 'lte' if descending == forward else 'gte'
+        return Q(**{f'{name}__{bound}': value}) & condition
+
+    def _make_page(self, rows, number, next_cursor=None, previous_cursor=None):
+        page = Page(rows, number, self)
+        page.next_cursor = next_cursor
+        page.previous_cursor = previous_cursor
+        return page
+
+    def _split(self, rows):
+        if len(rows) <= self.per_page:
+            return rows, None
+        rows = rows[:self.per_page]
+        return rows, self.encode_cursor(rows[-1], NEXT)
+
+    def get_page(self, cursor):
+        decoded = self.decode_cursor(cursor) if cursor else None
+        if decoded is None:
+            return self._first_page()
+        direction, values = decoded
+        if direction == NEXT:
+            return self._next_page(values, cursor)
+        return self._previous_page(values, cursor)
+
+    def _first_page(self):
+        rows = list(self.object_list[:self.per_page + 1])
+        rows, next_cursor = self._split(rows)
+        return self._make_page(rows, 1, next_cursor=next_cursor)
+
+    def _next_page(self, values, cursor):
+        rows = list(
+            self._after(self.object_list, values, forward=True)
+            [:self.per_page + 1]
+        )
+        rows, next_cursor = self._split(rows)
+        if not rows:
+            return self._make_page([], cursor)
+        return self._make_page(
+            rows, cursor,
+            next_cursor=next_cursor,
+            previous_cursor=self.encode_cursor(rows[0], PREVIOUS),
+        )
+
+    def _previous_page(self, values, cursor):
+        reverse = [
+            name[1:] if name.startswith('-') else f'-{name}'
+            for name in self.ordering
+        ]
+        rows = list(
+            self._after(self.object_list, values, forward=False)
+            .order_by(*reverse)[:self.per_page + 1]
+        )
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page][::-1]
+        if not has_more:
+            return self._first_page()
+        return self._make_page(
+            rows, cursor,
+            next_cursor=self.encode_cursor(rows[-1], NEXT),
+            previous_cursor=self.encode_cursor(rows[0], PREVIOUS),
+        )
+
+
+def paginate(request, queryset, posts_per_page, keyset=False,
+             count_scope=None, ordering=KEYSET_ORDERING):
+    """Возвращает страницу постов.
+
+    При keyset=True страница выбирается по параметру ?cursor=, а старые
+    ссылки вида ?page=N продолжают обслуживаться обычным паджинатором.
+    count_scope — пара (область, pk) для счётчика постов в кеше.
+    """
     page_number = request.GET.get('page')
+    if keyset and page_number is None:
+        paginator = KeysetPaginator(queryset, posts_per_page, ordering)
+        return paginator.get_page(request.GET.get('cursor'))
+    if count_scope is None:
+        paginator = Paginator(queryset, posts_per_page)
+    else:
+        paginator = CachedCountPaginator(
+            queryset, posts_per_page, *count_scope
+        )
     return paginator.get_page(page_number)
+
+
+def paginate_comments(post, cursor=None):
+    """Возвращает порцию комментариев поста начиная с курсора."""
+    paginator = KeysetPaginator(
+        post.comments.for_thread(),
+        settings.COMMENTS_PER_PAGE,
+        ordering=COMMENTS_ORDERING,
+    )
+    return paginator.get_page(cursor)
@@ -1,36 +1,71 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import Paginator
+from django.http import StreamingHttpResponse
+from django.views.decorators.http import condition
 
+from core.cache import fragment_context, page_scopes
+
+from . import conditional, counts, export, search
 from . forms import PostForm, CommentForm
 from . models import Post, Group, Follow, User
-from . utils import paginate
+from . utils import TIMELINE_ORDERING, paginate, paginate_comments
 
 
+@page_scopes(conditional.index_scopes)
+@condition(
+    etag_func=conditional.index_etag,
+    last_modified_func=conditional.index_last_modified,
+)
 def index(request):
-    post_list = Post.objects.all()
-    page_obj = paginate(request, post_list, settings.POSTS_PER_PAGE)
+    post_list = Post.objects.for_feed()
+    page_obj = paginate(
+        request, post_list, settings.POSTS_PER_PAGE, keyset=True,
+        count_scope=(counts.GLOBAL, None)
+    )
     context = {
         'page_obj': page_obj,
+        **fragment_context('posts'),
     }
     return render(request, 'posts/index.html', context)
 
 
+@page_scopes(conditional.group_scopes)
+@condition(
+    etag_func=conditional.group_etag,
+    last_modified_func=conditional.group_last_modified,
+)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
-    page_obj = paginate(request, post_list, settings.POSTS_PER_PAGE)
+    post_list = group.posts.for_feed()
+    page_obj = paginate(
+        request, post_list, settings.POSTS_PER_PAGE, keyset=True,
+        count_scope=(counts.GROUP, group.pk)
+    )
     context = {
         'group': group,
         'page_obj': page_obj,
+        **fragment_context('group', group.pk),
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@page_scopes(conditional.profile_scopes)
+@condition(
+    etag_func=conditional.profile_etag,
+    last_modified_func=conditional.profile_last_modified,
+)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    page_obj = paginate(request, post_list, settings.POSTS_PER_PAGE)
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
+    post_list = author.posts.for_feed()
+    page_obj = paginate(
+        request, post_list, settings.POSTS_PER_PAGE, keyset=True,
+        count_scope=(counts.AUTHOR, author.pk)
+    )
     following = None
     if request.user.is_authenticated:
         following = Follow.objects.filter(
@@ -40,13 +75,21 @@ def profile(request, username):
         'author': author,
         'page_obj': page_obj,
         'following': following,
+        **fragment_context('author', author.pk),
     }
     return render(request, 'posts/profile.html', context)
 
 
+@page_scopes(conditional.post_detail_scopes)
+@condition(
+    etag_func=conditional.post_etag,
+    last_modified_func=conditional.post_last_modified,
+)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.all()
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), pk=post_id
+    )
+    comments = paginate_comments(post)
     form = CommentForm(request.POST or None)
     context = {
         'post': post,
@@ -56,6 +99,32 @@ def post_detail(request, post_id):
     return render(request, 'posts/post_detail.html', context)
 
 
+def post_comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    comments = paginate_comments(post, request.GET.get('cursor'))
+    context = {
+        'post': post,
+        'comments': comments,
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
+def post_search(request):
+    query = request.GET.get('q', '').strip()
+    if search.fts_query(query):
+        paginator = search.SearchPaginator(
+            search.search(query), settings.POSTS_PER_PAGE
+        )
+    else:
+        paginator = Paginator([], settings.POSTS_PER_PAGE)
+    context = {
+        'query': query,
+        'page_obj': paginator.get_page(request.GET.get('cursor')),
+        'fragment_timeout': settings.FRAGMENT_CACHE_TIMEOUT,
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
@@ -101,10 +170,15 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    page_obj = paginate(request, post_list, settings.POSTS_PER_PAGE)
+    post_list = Post.objects.for_timeline(request.user)
+    page_obj = paginate(
+        request, post_list, settings.POSTS_PER_PAGE, keyset=True,
+        count_scope=(counts.FOLLOWER, request.user.pk),
+        ordering=TIMELINE_ORDERING
+    )
     context = {
         'page_obj': page_obj,
+        'fragment_timeout': settings.FRAGMENT_CACHE_TIMEOUT,
     }
     return render(request, 'posts/follow.html', context)
 
@@ -131,3 +205,40 @@ def profile_unfollow(request, username):
     follow = Follow.objects.filter(user=request.user, author=following_author)
     follow.delete()
     return redirect('posts:profile', username=username)
+
+
+def _export_response(request, content, filename):
+    """JSON Lines или, с ?media=1, zip с картинками — потоком."""
+    if request.GET.get('media'):
+        response = StreamingHttpResponse(
+            export.zip_stream(*content), content_type='application/zip'
+        )
+        filename += '.zip'
+    else:
+        response = StreamingHttpResponse(
+            export.jsonl(export.rows(*content)),
+            content_type='application/x-ndjson; charset=utf-8'
+        )
+        filename += '.jsonl'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@login_required
+def profile_export(request, username):
+    author = get_object_or_404(User, username=username)
+    if request.user != author and not request.user.is_staff:
+        raise PermissionDenied
+    return _export_response(
+        request, export.author_content(author), f'author-{author.pk}'
+    )
+
+
+@login_required
+def group_export(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    if not request.user.is_staff:
+        raise PermissionDenied
+    return _export_response(
+        request, export.group_content(group), f'group-{group.slug}'
+    )
@@ -39,6 +39,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -46,6 +47,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.AnonymousPageCacheMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -144,7 +146,81 @@ CACHES = {
     }
 }
 
+# Общий для всех воркеров кеш на диске: путь к файлу SQLite.
+SHARED_CACHE_PATH = os.getenv('SHARED_CACHE_PATH')
+if SHARED_CACHE_PATH:
+    CACHES['default'] = {
+        'BACKEND': 'core.cache_backends.SQLiteCache',
+        'LOCATION': SHARED_CACHE_PATH,
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
+    }
+
+# Замеры каждого запроса: заголовок Server-Timing и лог медленных
+# запросов дольше REQUEST_METRICS_SLOW_MS миллисекунд. Заголовок
+# раскрывает число запросов и попадания в кеш, поэтому по умолчанию
+# отдаётся только в режиме отладки.
+REQUEST_METRICS_SERVER_TIMING = DEBUG
+REQUEST_METRICS_SLOW_MS = 500
+
+# Профиль шаблонов и тегов каждого запроса в логе core.middleware.
+# Включается переменной окружения: обёртка стоит на каждом узле шаблона.
+TEMPLATE_PROFILING = os.getenv('TEMPLATE_PROFILING', '').lower() in (
+    '1', 'true', 'yes'
+)
+TEMPLATE_PROFILING_TOP = 20
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.middleware': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
+
+POST_COUNT_TIMEOUT = 60 * 60
+TIMELINE_SIZE = 1000
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 6
+PAGE_CACHE_TIMEOUT = 60 * 60
+# Как часто процесс сбрасывает счётчики попаданий в общий кеш, секунд.
+PAGE_CACHE_STATS_FLUSH = 60
+# Представления должны объявить области страницы через core.cache.page_scopes.
+PAGE_CACHE_VIEWS = [
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+    'posts:index_rss',
+    'posts:index_atom',
+    'posts:group_rss',
+    'posts:group_atom',
+    'posts:profile_rss',
+    'posts:profile_atom',
+]
+
 CHARS_IN_STR = 15
 POSTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 20
+FEED_ITEMS = 20
+FEED_TITLE_WORDS = 10
+
+# Загруженные картинки: предел по заголовку, наибольшая сторона
+# сохраняемого оригинала и качество перекодирования в JPEG.
+POST_IMAGE_MAX_PIXELS = 50_000_000
+POST_IMAGE_MAX_SIDE = 2560
+POST_IMAGE_JPEG_QUALITY = 85
+
+# Миниатюры постов строятся при сохранении картинки: в пуле из
+# POST_THUMBNAIL_WORKERS процессов или, при 0, после отправки ответа.
+# Каждая ширина кодируется во всех форматах, которые умеет Pillow.
+POST_THUMBNAIL_GEOMETRY = '960x339'
+POST_THUMBNAIL_WIDTHS = (320, 640, 960)
+POST_THUMBNAIL_FORMATS = ('WEBP', 'JPEG')
+POST_THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+POST_THUMBNAIL_WORKERS = 2
 TEST_PAGINATOR_NUMBER = 13
 TEST_SECOND_PAGE = TEST_PAGINATOR_NUMBER - POSTS_PER_PAGE